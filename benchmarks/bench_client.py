@@ -0,0 +1,199 @@
+"""Compares resident memory and startup work of the client profiles.
+
+Each profile runs in its own process. A synthetic READY for an account with
+many guilds is fed through discord.py-self's own gateway parsers, followed by
+a stream of messages, with a fake gateway in place of the websocket. Nothing
+connects to Discord.
+
+Startup is measured as the local time to parse READY and get to ``on_ready``
+plus the gateway requests the client sends first. Those are rate limited to
+110 a minute, so past that they dominate the real startup time.
+
+Member list chunking is done by scraping the member sidebar, which this can't
+fake, so chunking a guild is approximated as one request per 100 members and
+caching all of them, which is what it ends up doing.
+
+    python -m benchmarks.bench_client --guilds 200 --messages 20000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+
+GATEWAY_RATE = 110  # requests per minute, see discord.gateway.GatewayRatelimiter
+
+
+class FakeGateway:
+    def __init__(self):
+        self.requests = 0
+
+    async def request_lazy_guild(self, guild_id, **kwargs):
+        self.requests += 1
+
+    async def request_chunks(self, guild_ids, **kwargs):
+        self.requests += 1
+
+
+def user(user_id):
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def member(user_id):
+    return {"user_id": str(user_id), "roles": [], "joined_at": "2023-01-01T00:00:00+00:00", "deaf": False, "mute": False}
+
+
+def make_ready(rng, args, me):
+    guilds, extra, merged_me, merged_members, presences, users = [], [], [], [], [], {}
+    for index in range(args.guilds):
+        guild_id = 10_000 + index
+        # most guilds are small, a few are huge
+        count = int(rng.paretovariate(1.2) * 40)
+        channels = [
+            {"id": str(guild_id * 100 + c), "type": 0, "name": f"c{c}", "position": c, "permission_overwrites": []}
+            for c in range(args.channels)
+        ]
+        guilds.append({
+            "id": str(guild_id),
+            "name": f"guild{index}",
+            "member_count": count,
+            "channels": channels,
+            "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "1024", "position": 0, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False}],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "threads": [],
+        })
+        extra.append({"id": str(guild_id), "voice_states": []})
+        merged_me.append([member(me)])
+        # READY_SUPPLEMENTAL carries the members that were recently active
+        active = [rng.randrange(1, 10 * args.guilds * 40) for _ in range(min(count, args.active))]
+        for user_id in active:
+            users[user_id] = user(user_id)
+        merged_members.append([member(user_id) for user_id in active])
+        presences.append([
+            {"user_id": str(user_id), "status": "online", "activities": [], "client_status": {"desktop": "online"}}
+            for user_id in active
+        ])
+    ready = {"user": user(me), "guilds": guilds, "users": list(users.values()), "merged_members": merged_me,
+             "relationships": [], "private_channels": [], "v": 9, "session_id": "bench"}
+    supplemental = {"guilds": extra, "merged_members": merged_members,
+                    "merged_presences": {"guilds": presences, "friends": []}}
+    return ready, supplemental
+
+
+def make_message(rng, message_id, guild):
+    author = rng.randrange(1, 10 * len(guild) * 40 + 1)
+    data = guild[rng.randrange(len(guild))]
+    channel = data["channels"][rng.randrange(len(data["channels"]))]
+    return {
+        "id": str(message_id), "channel_id": channel["id"], "guild_id": data["id"], "author": user(author),
+        "member": {"roles": [], "joined_at": "2023-01-01T00:00:00+00:00", "deaf": False, "mute": False},
+        "content": "a message of about the usual length, nothing to match here " * 2,
+        "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False,
+        "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+        "pinned": False, "type": 0,
+    }
+
+
+def rss():
+    import psutil
+
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+
+async def child(args):
+    import discord
+    from discord import Member
+
+    from utils.client import client_options
+
+    rng = random.Random(args.seed)
+    me = 1
+    ready, supplemental = make_ready(rng, args, me)
+    messages = [make_message(rng, 10**15 + i, ready["guilds"]) for i in range(args.messages)]
+
+    client = discord.Client(**client_options(args.child))
+    state = client._connection
+    state.dispatch = lambda *a, **k: None
+    state.call_handlers = lambda *a, **k: None
+    gateway = FakeGateway()
+    client.ws = gateway
+
+    async def chunk_guild(guild, *, wait=True, channels=None):
+        gateway.requests += math.ceil(guild._member_count / 100)
+        for user_id in range(1, guild._member_count + 1):
+            guild._add_member(Member(data={**member(user_id), "user": user(user_id)}, guild=guild, state=state))
+        future = asyncio.get_running_loop().create_future()
+        future.set_result([])
+        return await future if wait else future
+
+    state.chunk_guild = chunk_guild
+    before = rss()
+
+    start = time.perf_counter()
+    state.parse_ready(ready)
+    state.parse_ready_supplemental(supplemental)
+    await state._ready_task
+    startup = time.perf_counter() - start
+    after_ready = rss()
+
+    start = time.perf_counter()
+    for data in messages:
+        state.parse_message_create(data)
+    per_message = (time.perf_counter() - start) / len(messages)
+    after_messages = rss()
+    # what's left once the synthetic payloads are gone
+    del ready, supplemental, messages
+    total = rss()
+
+    print(json.dumps({
+        "startup": startup,
+        "requests": gateway.requests,
+        "ready_mib": (after_ready - before) / 2**20,
+        "messages_mib": (after_messages - after_ready) / 2**20,
+        "total_mib": total / 2**20,
+        "members": sum(len(g._members) for g in state._guilds.values()),
+        "cached_messages": len(state._messages or ()),
+        "per_message_us": per_message * 1e6,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=10, help="channels per guild")
+    parser.add_argument("--active", type=int, default=50, help="recently active members sent per guild")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args))
+        return
+
+    print(f"{'profile':<9}{'ready':>10}{'requests':>10}{'rate limit':>12}{'members':>10}"
+          f"{'messages':>10}{'ready MiB':>11}{'msgs MiB':>10}{'RSS MiB':>9}{'us/msg':>8}")
+    for profile in ("default", "lean"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_client", *sys.argv[1:], "--child", profile],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        r = json.loads(output.splitlines()[-1])
+        # the first GATEWAY_RATE requests go out at once, the rest wait a minute per batch
+        wait = (r["requests"] // GATEWAY_RATE) * 60
+        print(f"{profile:<9}{r['startup'] * 1e3:>8.0f}ms{r['requests']:>10}{wait:>11}s{r['members']:>10}"
+              f"{r['cached_messages']:>10}{r['ready_mib']:>11.1f}{r['messages_mib']:>10.1f}"
+              f"{r['total_mib']:>9.1f}{r['per_message_us']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
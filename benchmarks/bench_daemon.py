@@ -0,0 +1,122 @@
+"""Measures dispatch throughput through the dispatch daemon.
+
+Runs ``DispatchDaemon`` in its own process with the fake PiShock API from
+``bench_replay`` (no latency, no merging or rate limit), then sends
+commands from this process over the Unix socket, the way the bot would with
+``SHOCKER_TRANSPORT=daemon``. For comparison it also times the spool on its
+own and the same commands sent to an in-process ``ShockerPool``:
+
+    python -m benchmarks.bench_daemon --commands 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_replay import FakePiShockAPI, percentile
+from utils.daemon import DaemonClient, DispatchDaemon
+from utils.dispatch import Device, ShockerPool
+from utils.spool import CommandSpool
+
+DEVICES = [Device("bench")]
+
+
+def make_pool() -> ShockerPool:
+    # no merging window and no rate limit, so every command is an API call
+    return ShockerPool(FakePiShockAPI("bench", "bench"), DEVICES, window=0, rate=1e9, burst=10**9)
+
+
+async def serve(socket_path: str, spool_path: str) -> None:
+    daemon = DispatchDaemon(make_pool(), CommandSpool(spool_path))
+    await daemon.start(socket_path)
+    # runs until the parent kills it
+    await asyncio.Event().wait()
+
+
+async def drive(send, commands: int, concurrency: int) -> tuple[float, list[float]]:
+    latencies = []
+    remaining = iter(range(commands))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            results = await send("vibrate", 1, 10)
+            latencies.append(time.perf_counter() - start)
+            if results[0].error is not None:
+                raise results[0].error
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def show(name, elapsed, latencies):
+    print(
+        f"{name:<22}{len(latencies) / elapsed:>8.0f} cmd/s   p50 {percentile(latencies, 50) * 1e3:6.2f} ms"
+        f"   p99 {percentile(latencies, 99) * 1e3:6.2f} ms"
+    )
+
+
+def bench_spool(path: str, commands: int) -> None:
+    spool = CommandSpool(path)
+    start = time.perf_counter()
+    for _ in range(commands):
+        command = spool.add("direct", "vibrate", 1, 10)
+        spool.claim(command.id)
+        spool.done(command.id)
+    elapsed = time.perf_counter() - start
+    spool.close()
+    print(f"{'spool add/claim/done':<22}{commands / elapsed:>8.0f} cmd/s   {elapsed / commands * 1e3:.2f} ms each")
+
+
+async def run(args, workdir: str) -> None:
+    bench_spool(os.path.join(workdir, "spool-only.db"), min(args.commands, 500))
+
+    pool = make_pool()
+    for concurrency in sorted({1, args.concurrency}):
+        elapsed, latencies = await drive(pool.send_direct, args.commands, concurrency)
+        show(f"in-process x{concurrency}", elapsed, latencies)
+    pool.close()
+
+    socket_path = os.path.join(workdir, "dispatch.sock")
+    daemon = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_daemon", "--serve", workdir]
+    )
+    try:
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.05)
+        client = DaemonClient(socket_path, DEVICES)
+        for concurrency in sorted({1, args.concurrency}):
+            elapsed, latencies = await drive(client.send_direct, args.commands, concurrency)
+            show(f"daemon x{concurrency}", elapsed, latencies)
+        stats = await client.stats()
+        print(f"daemon stats: acked {stats['acked']}, completed {stats['completed']}, spooled {stats['spooled']}")
+        client.close()
+    finally:
+        daemon.kill()
+        daemon.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(
+            serve(os.path.join(args.serve, "dispatch.sock"), os.path.join(args.serve, "spool.db"))
+        )
+        return
+
+    with tempfile.TemporaryDirectory(prefix="shock-daemon-") as workdir:
+        asyncio.run(run(args, workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Times ``>history`` queries against a large shock history.
+
+Fills a temporary database with synthetic shocks spread over the last
+``--days`` days, then runs the filters ``>history`` supports:
+
+    python -m benchmarks.bench_history --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_matcher import random_word  # noqa: E402
+from utils.history import ShockEvent, ShockHistory, connect  # noqa: E402
+
+
+def fill(path, rows, users, words, days, rng):
+    now = time.time()
+    user_ids = [rng.randrange(10**17, 10**18) for _ in range(users)]
+    word_list = [random_word(rng) for _ in range(words)]
+    conn = connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO shocks (ts, user_id, word, mode, intensity, duration, device, result)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                ShockEvent(
+                    now - rng.random() * days * 86400,
+                    rng.choice(user_ids),
+                    rng.choice(word_list),
+                    "shock",
+                    rng.randint(1, 100),
+                    rng.randint(1, 15),
+                    "abc123",
+                    "sent",
+                )
+                for _ in range(rows)
+            ),
+        )
+    conn.close()
+    return user_ids, word_list
+
+
+def time_query(history, label, repeat, **filters):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        found = history._query(**filters)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<28} {elapsed * 1e3:8.3f} ms  ({len(found)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        history = ShockHistory(path)
+        start = time.perf_counter()
+        user_ids, words = fill(path, args.rows, args.users, args.words, args.days, rng)
+        print(f"filled {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        for _ in range(10_000):
+            history.record(ShockEvent(time.time(), user_ids[0], words[0], "shock", 10, 1, "abc123", "sent"))
+        queued = time.perf_counter() - start
+        history.close()
+        print(f"record(): {queued / 10_000 * 1e6:.2f} us per event on the caller, written in batches")
+
+        history = ShockHistory(path)
+        now = time.time()
+        print("queries:")
+        time_query(history, "latest 10", args.repeat)
+        time_query(history, "user", args.repeat, user_id=user_ids[1])
+        time_query(history, "word", args.repeat, word=words[1])
+        time_query(history, "last hour", args.repeat, since=now - 3600)
+        time_query(history, "user, last day", args.repeat, user_id=user_ids[1], since=now - 86400)
+        time_query(history, "user + word", args.repeat, user_id=user_ids[1], word=words[1])
+        time_query(history, "word, a week a month ago", args.repeat,
+                   word=words[1], since=now - 35 * 86400, until=now - 28 * 86400)
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
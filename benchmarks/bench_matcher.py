@@ -0,0 +1,71 @@
+"""Micro-benchmark for the trigger matcher.
+
+Compares the old per-word substring scan against ``TriggerMatcher`` for
+wordlists of 10 to 10,000 entries.
+
+    python -m benchmarks.bench_matcher
+"""
+
+import argparse
+import random
+import string
+import time
+
+from utils.matcher import TriggerMatcher
+
+
+def random_word(rng: random.Random, low: int = 3, high: int = 10) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def make_messages(rng: random.Random, words: list[str], count: int, ratio: float):
+    messages = []
+    for _ in range(count):
+        filler = [random_word(rng) for _ in range(rng.randint(5, 25))]
+        if rng.random() < ratio:
+            filler.insert(rng.randrange(len(filler) + 1), rng.choice(words))
+        messages.append(" ".join(filler))
+    return messages
+
+
+def substring_scan(words, message):
+    content = message.lower()
+    return any(word in content for word in words)
+
+
+def bench(fn, messages, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--ratio", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'words':>7} {'build ms':>9} {'scan us/msg':>12} {'matcher us/msg':>15} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(args.seed)
+        words = list({random_word(rng, 4, 12) for _ in range(size)})
+        messages = make_messages(rng, words, args.messages, args.ratio)
+
+        start = time.perf_counter()
+        matcher = TriggerMatcher(words)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        scan = bench(lambda m: substring_scan(words, m), messages, args.repeat)
+        compiled = bench(matcher.search, messages, args.repeat)
+        print(f"{len(words):>7} {build_ms:>9.2f} {scan:>12.2f} {compiled:>15.2f} {scan / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measures what normalized matching adds per message.
+
+Compares ``TriggerRules.match`` with no word opting into normalization (the
+plain case-insensitive path) against every word opting in, on messages that
+mostly don't match, which is the case that pays for the extra pass:
+
+    python -m benchmarks.bench_normalize --words 100
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.bench_matcher import bench, make_messages, random_word
+from utils.normalize import normalize, table
+from utils.rules import TriggerRules
+
+OBFUSCATIONS = [
+    lambda w: w.upper().replace("O", "0").replace("E", "3"),
+    lambda w: "".join(chr(ord(c) + 0xFEE0) for c in w),  # full width
+    lambda w: "​".join(w),
+    lambda w: w.replace("a", "а").replace("o", "о").replace("e", "е"),  # Cyrillic
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--ratio", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = list({random_word(rng, 4, 12) for _ in range(args.words)})
+    messages = make_messages(rng, words, args.messages, args.ratio)
+    disguised = [rng.choice(OBFUSCATIONS)(w) for w in words]
+    obfuscated = make_messages(rng, disguised, args.messages, 1.0)
+
+    start = time.perf_counter()
+    table()
+    print(f"table build:            {(time.perf_counter() - start) * 1000:.2f} ms ({len(table())} entries)")
+
+    plain = TriggerRules({"words": words})
+    normalized = TriggerRules({"words": words, "default": {"normalize": True}})
+
+    lower = bench(str.lower, messages, args.repeat)
+    translate = bench(normalize, messages, args.repeat)
+    plain_us = bench(plain.match, messages, args.repeat)
+    normalized_us = bench(normalized.match, messages, args.repeat)
+    print(f"str.lower:              {lower:.2f} us/msg")
+    print(f"normalize:              {translate:.2f} us/msg")
+    print(f"plain match:            {plain_us:.2f} us/msg")
+    print(f"normalized match:       {normalized_us:.2f} us/msg (+{normalized_us - plain_us:.2f})")
+
+    caught_plain = sum(1 for m in obfuscated if plain.match(m))
+    caught = sum(1 for m in obfuscated if normalized.match(m))
+    print(f"{len(obfuscated)} obfuscated triggers: plain caught {caught_plain}, normalized caught {caught}")
+
+
+if __name__ == "__main__":
+    main()
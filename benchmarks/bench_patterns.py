@@ -0,0 +1,102 @@
+"""Measures how precisely pattern steps go out while the event loop is busy.
+
+Plays one pattern through ``PatternScheduler`` with a fake API that blocks a
+worker thread per call, while background tasks hog the loop for a few
+milliseconds at a time, like a burst of messages would. The same pattern is
+also played the naive way (send, then sleep for the step), which is what
+issuing the commands one after another amounts to:
+
+    python -m benchmarks.bench_patterns --steps 40 --step 0.05 --load 0.6
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.bench_replay import percentile
+from utils.patterns import PatternScheduler, Step
+
+
+async def hog(rng, load, stop):
+    """keeps the loop busy for ``load`` of the time, in 1-5 ms slices"""
+    while not stop.is_set():
+        busy = rng.uniform(0.001, 0.005)
+        end = time.perf_counter() + busy
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(busy * (1 - load) / load if load < 1 else 0)
+
+
+async def fake_send(latency, sent):
+    sent.append(time.monotonic())
+    await asyncio.to_thread(time.sleep, latency)
+
+
+async def scheduled(steps, latency):
+    sent = []
+    scheduler = PatternScheduler(lambda step: fake_send(latency, sent))
+    start = time.monotonic()
+    scheduler.start("bench", steps)
+    await scheduler._task
+    return start, sent, scheduler.last_errors
+
+
+async def naive(steps, latency):
+    sent = []
+    start = time.monotonic()
+    for step in steps:
+        await fake_send(latency, sent)
+        await asyncio.sleep(step.duration + step.gap)
+    return start, sent
+
+
+def errors(start, sent, steps):
+    due, result = 0.0, []
+    for step, at in zip(steps, sent):
+        result.append(at - (start + due))
+        due += step.duration + step.gap
+    return result
+
+
+def show(name, values):
+    print(
+        f"{name:<10} p50 {percentile(values, 50) * 1e3:7.2f} ms   p99 {percentile(values, 99) * 1e3:7.2f} ms"
+        f"   max {max(values) * 1e3:7.2f} ms   last step {values[-1] * 1e3:7.2f} ms"
+    )
+
+
+async def run(args):
+    # durations are whole seconds in real patterns, shorter here to keep the run quick
+    steps = tuple(Step("vibrate", 10, args.step, args.gap) for _ in range(args.steps))
+    rng = random.Random(args.seed)
+    stop = asyncio.Event()
+    hogs = [asyncio.create_task(hog(rng, args.load, stop)) for _ in range(args.hogs)] if args.load else []
+
+    start, sent, recorded = await scheduled(steps, args.latency)
+    show("scheduler", errors(start, sent, steps))
+    # what the scheduler measured itself as each send started, from when its
+    # task began playing rather than from start(), so lower by that delay
+    show("recorded", recorded)
+    start, sent = await naive(steps, args.latency)
+    show("naive", errors(start, sent, steps))
+
+    stop.set()
+    await asyncio.gather(*hogs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=40)
+    parser.add_argument("--step", type=float, default=0.05, help="step duration in seconds")
+    parser.add_argument("--gap", type=float, default=0.02, help="gap after each step in seconds")
+    parser.add_argument("--latency", type=float, default=0.03, help="fake API latency in seconds")
+    parser.add_argument("--load", type=float, default=0.6, help="share of time the loop is kept busy")
+    parser.add_argument("--hogs", type=int, default=1, help="background tasks hogging the loop")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
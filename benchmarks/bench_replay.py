@@ -0,0 +1,268 @@
+"""Replays synthetic messages through the Shocker cog.
+
+Messages are fed straight into ``Shocker.on_message`` (or ``shock_message`` /
+``send_shock``) at a controlled rate, with a fake PiShock API that sleeps and
+fails on demand. Nothing touches the network or Discord.
+
+    python -m benchmarks.bench_replay --rate 500 --messages 5000 --words 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_matcher import make_messages, random_word  # noqa: E402
+
+
+class FakeShocker:
+    def __init__(self, api, code):
+        self.api = api
+        self.code = code
+
+    def _operate(self):
+        self.api.calls += 1
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        if self.api.rng.random() < self.api.error_rate:
+            self.api.errors += 1
+            raise RuntimeError("Device currently not connected.")
+
+    def shock(self, *, duration, intensity):
+        self._operate()
+
+    def vibrate(self, *, duration, intensity):
+        self._operate()
+
+    def beep(self, duration):
+        self._operate()
+
+
+class FakePiShockAPI:
+    """Stands in for PiShockAPI, blocking for ``latency`` seconds per call."""
+
+    latency = 0.0
+    error_rate = 0.0
+
+    def __init__(self, username, api_key, *args, **kwargs):
+        self.username = username
+        self.api_key = api_key
+        self.rng = random.Random(0)
+        self.calls = 0
+        self.errors = 0
+
+    def shocker(self, code, *args, **kwargs):
+        return FakeShocker(self, code)
+
+    def close(self):
+        pass
+
+
+class FakeAuthor:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.bot = False
+
+
+class FakeChannel:
+    def __init__(self):
+        self.id = 1
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class FakeGuild:
+    id = 1
+
+
+class FakeMessage:
+    """The parts of discord.Message the cog reads."""
+
+    guild = FakeGuild()
+
+    def __init__(self, message_id, content, author, channel):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+
+
+class FakeBot:
+    latency = 0.0
+    user = None
+
+    def __init__(self):
+        from utils.status import StatusWriter
+
+        self.status_writer = StatusWriter()
+        self.carryover = {}
+        self.reloading = False
+
+
+class LoopLagProbe:
+    """Measures how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(loop.time() - start - self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def write_config(directory, words, whitelist):
+    with open(os.path.join(directory, "wordlist.json"), "w") as f:
+        json.dump({"words": words}, f)
+    with open(os.path.join(directory, "whitelist.json"), "w") as f:
+        json.dump({"whitelist": whitelist}, f)
+
+
+async def make_cog(shock_module, devices=1):
+    import utils.dispatch
+
+    utils.dispatch.PooledPiShockAPI = FakePiShockAPI
+    cog = shock_module.Shocker(FakeBot())
+    cog.shocker_username = "bench"
+    cog.shocker_apikey = "bench"
+    cog.shocker_code = ",".join(f"bench{i}" for i in range(devices))
+    await cog.cog_load()
+    return cog
+
+
+async def replay(cog, messages, rate, target):
+    latencies = []
+    probe = LoopLagProbe()
+    probe.start()
+
+    async def handle(message):
+        start = time.perf_counter()
+        if target == "on_message":
+            await cog.on_message(message)
+        elif target == "shock_message":
+            match = cog.rules.match(message.content)
+            if match:
+                await cog.shock_message(message, match)
+        else:
+            await cog.send_shock(message, 1, 10)
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for index, message in enumerate(messages):
+        if rate:
+            delay = start + index / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle(message)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    probe.stop()
+    return latencies, elapsed, probe.samples
+
+
+def report(args, cog, latencies, elapsed, lag):
+    api = cog.shock_api
+    print(f"target:        {args.target}")
+    print(f"messages:      {len(latencies)} in {elapsed:.3f}s ({len(latencies) / elapsed:.0f} msg/s)")
+    print(f"latency p50:   {percentile(latencies, 50) * 1e3:.3f} ms")
+    print(f"latency p99:   {percentile(latencies, 99) * 1e3:.3f} ms")
+    print(f"latency max:   {max(latencies) * 1e3:.3f} ms")
+    print(f"loop lag p50:  {percentile(lag, 50) * 1e3:.3f} ms")
+    print(f"loop lag p99:  {percentile(lag, 99) * 1e3:.3f} ms")
+    print(f"loop lag mean: {statistics.fmean(lag) * 1e3 if lag else 0:.3f} ms")
+    print(f"api calls:     {api.calls} ({api.errors} errors)")
+    for code, queue in cog.queues.items():
+        print(f"queue {code}:   {queue.stats()}")
+    if args.metrics:
+        from utils.metrics import METRICS
+
+        print(METRICS.render_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1000, help="messages per second, 0 for unthrottled")
+    parser.add_argument("--words", type=int, default=100, help="wordlist size")
+    parser.add_argument("--whitelist", type=int, default=10, help="whitelist size")
+    parser.add_argument("--authors", type=int, default=50, help="distinct message authors")
+    parser.add_argument("--ratio", type=float, default=0.1, help="share of messages containing a trigger")
+    parser.add_argument("--devices", type=int, default=1, help="share codes to fan out to")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake API latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake API calls that fail")
+    parser.add_argument(
+        "--target",
+        choices=("on_message", "shock_message", "send_shock"),
+        default="on_message",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", action="store_true", help="also print the cog's own stage metrics")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = list({random_word(rng, 4, 12) for _ in range(args.words)})
+    whitelist = list(range(1, args.whitelist + 1))
+    contents = make_messages(rng, words, args.messages, args.ratio)
+
+    FakePiShockAPI.latency = args.latency
+    FakePiShockAPI.error_rate = args.error_rate
+
+    workdir = tempfile.mkdtemp(prefix="shock-bench-")
+    os.chdir(workdir)
+    write_config(workdir, words, whitelist)
+
+    stdout, stderr = sys.stdout, sys.stderr
+    import cogs.shock as shock_module
+
+    # main.py redirects stdout into the bot log on import
+    sys.stdout, sys.stderr = stdout, stderr
+
+    channel = FakeChannel()
+    authors = [FakeAuthor(i) for i in range(1, args.authors + 1)]
+    messages = [
+        FakeMessage(index, content, rng.choice(authors), channel)
+        for index, content in enumerate(contents)
+    ]
+
+    async def run():
+        cog = await make_cog(shock_module, args.devices)
+        latencies, elapsed, lag = await replay(cog, messages, args.rate, args.target)
+        report(args, cog, latencies, elapsed, lag)
+        await cog.cog_unload()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
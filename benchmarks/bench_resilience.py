@@ -0,0 +1,111 @@
+"""Sends shocks through the real HTTP client to the fake PiShock API.
+
+Runs a few failure scenarios against ``benchmarks.fake_pishock`` and reports
+how long triggers took, how many were retried, timed out or rejected by the
+circuit breaker, and how many operations reached the "device":
+
+    python -m benchmarks.bench_resilience --shocks 20 --timeout 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_replay import percentile  # noqa: E402
+from benchmarks.fake_pishock import FakePiShockServer  # noqa: E402
+from utils.dispatch import Device, PooledPiShockAPI, ShockerPool  # noqa: E402
+from utils.resilience import CircuitBreaker, ResiliencePolicy  # noqa: E402
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/api"
+
+
+async def run_scenario(name, url, args, server=None, recover_after=None):
+    api = PooledPiShockAPI("user", "key", api_url=url, timeout=args.timeout)
+    resilience = ResiliencePolicy(
+        timeout=args.timeout,
+        retries=args.retries,
+        backoff=0.05,
+        breaker=CircuitBreaker(args.failures, args.reset),
+    )
+    pool = ShockerPool(
+        api, [Device(f"code{i}") for i in range(args.devices)],
+        resilience=resilience, window=0, rate=1000, burst=1000,
+    )
+    latencies, errors = [], {}
+    states = set()
+    try:
+        for i in range(args.shocks):
+            if recover_after is not None and i == recover_after:
+                server.status = 200
+                server.latency = 0
+            start = time.perf_counter()
+            for outcome in await pool.send("shock", 1, 10):
+                if outcome.error is not None:
+                    kind = type(outcome.error).__name__
+                    errors[kind] = errors.get(kind, 0) + 1
+            latencies.append(time.perf_counter() - start)
+            states.add(pool.breaker.state)
+            await asyncio.sleep(args.interval)
+    finally:
+        pool.close()
+
+    print(f"{name}:")
+    print(f"  trigger p50:   {percentile(latencies, 50) * 1e3:.1f} ms")
+    print(f"  trigger max:   {max(latencies) * 1e3:.1f} ms")
+    print(f"  delivered:     {len(server.requests) if server else 0}")
+    print(f"  errors:        {errors or 'none'}")
+    print(f"  policy:        {resilience.stats()}")
+    print(f"  breaker seen:  {', '.join(sorted(states))}")
+
+
+async def run(args):
+    server = FakePiShockServer().start()
+    try:
+        await run_scenario("healthy", server.url, args, server)
+
+        server.requests.clear()
+        server.busy_rate = 0.3
+        await run_scenario("device busy 30%", server.url, args, server)
+        server.busy_rate = 0
+
+        server.requests.clear()
+        server.latency = args.timeout * 2
+        await run_scenario("slower than the deadline", server.url, args, server)
+        server.latency = 0
+
+        server.requests.clear()
+        server.status = 503
+        await run_scenario(
+            "outage, then recovery", server.url, args, server, recover_after=args.shocks // 2
+        )
+
+        await run_scenario("connection refused", closed_port_url(), args)
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shocks", type=int, default=20, help="triggers per scenario")
+    parser.add_argument("--devices", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between triggers")
+    parser.add_argument("--timeout", type=float, default=0.5, help="per-call deadline")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--failures", type=int, default=5, help="failures before the breaker opens")
+    parser.add_argument("--reset", type=float, default=0.3, help="seconds the breaker stays open")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compares shock latency over the HTTP API and the local serial transport.
+
+Both paths go through the real ``ShockerPool``: HTTP through
+``PooledPiShockAPI`` to ``benchmarks.fake_pishock`` and serial through
+``SerialTransport`` to ``benchmarks.fake_serial_pishock`` on a pty. The fake
+API is on loopback, so use ``--http-latency`` to add a realistic internet
+round-trip:
+
+    python -m benchmarks.bench_transport --shocks 200 --http-latency 0.08
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_replay import percentile  # noqa: E402
+from benchmarks.fake_pishock import FakePiShockServer  # noqa: E402
+from benchmarks.fake_serial_pishock import FakeSerialPiShock  # noqa: E402
+from utils.dispatch import Device, PooledPiShockAPI, ShockerPool  # noqa: E402
+from utils.transport import SerialTransport  # noqa: E402
+
+
+async def measure(api, code, received, shocks):
+    """returns (call latencies, send-to-device latencies)"""
+    pool = ShockerPool(api, [Device(code)], window=0, rate=1e6, burst=1000)
+    calls, starts = [], []
+    try:
+        for _ in range(shocks):
+            start = time.perf_counter()
+            for outcome in await pool.send("shock", 1, 10):
+                if outcome.error is not None:
+                    raise outcome.error
+            calls.append(time.perf_counter() - start)
+            starts.append(start)
+        # serial writes return before the hub has read them
+        await asyncio.sleep(0.1)
+    finally:
+        pool.close()
+    return calls, [at - start for start, (at, _) in zip(starts, received)]
+
+
+def report(name, calls, device):
+    print(f"{name}:")
+    print(f"  call p50/p99/max:    {percentile(calls, 50) * 1e3:.3f} / {percentile(calls, 99) * 1e3:.3f} / {max(calls) * 1e3:.3f} ms")
+    print(f"  device p50/p99/max:  {percentile(device, 50) * 1e3:.3f} / {percentile(device, 99) * 1e3:.3f} / {max(device) * 1e3:.3f} ms")
+
+
+async def run(args):
+    server = FakePiShockServer(latency=args.http_latency).start()
+    try:
+        api = PooledPiShockAPI("user", "key", api_url=server.url)
+        report("http", *await measure(api, "abc123", server.requests, args.shocks))
+    finally:
+        server.stop()
+
+    device = FakeSerialPiShock([420]).start()
+    try:
+        transport = await asyncio.to_thread(SerialTransport, device.port)
+        report("serial", *await measure(transport, "420", device.operations, args.shocks))
+    finally:
+        device.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shocks", type=int, default=200)
+    parser.add_argument("--http-latency", type=float, default=0.0, help="seconds the fake API waits before answering")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
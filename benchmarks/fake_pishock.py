@@ -0,0 +1,102 @@
+"""A local stand-in for the PiShock HTTP API.
+
+Answers ``POST /api/apioperate`` like the real API, with knobs for latency,
+HTTP errors and busy devices, so the bot can be pointed at it through
+``PISHOCK_API_URL``:
+
+    python -m benchmarks.fake_pishock --port 8765 --latency 0.2 --status 503
+    PISHOCK_API_URL=http://127.0.0.1:8765/api python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePiShockServer(ThreadingHTTPServer):
+    """The fake API, its knobs can be changed while it's running."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, status: int = 200, busy_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), FakePiShockHandler)
+        self.latency = latency
+        self.status = status
+        self.busy_rate = busy_rate
+        self.rng = random.Random(0)
+        self.requests = []  # (time received, operation params)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api"
+
+    def start(self) -> "FakePiShockServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakePiShockHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.status != 200:
+            self._reply(server.status, "Service Unavailable")
+            return
+        if not self.path.endswith("/apioperate"):
+            self._reply(404, "Not Found")
+            return
+        if server.rng.random() < server.busy_rate:
+            self._reply(200, "Device in Use.")
+            return
+
+        server.requests.append((time.perf_counter(), json.loads(body or b"{}")))
+        self._reply(200, "Operation Succeeded.")
+
+    def _reply(self, status: int, text: str) -> None:
+        data = text.encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up waiting
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each reply")
+    parser.add_argument("--status", type=int, default=200, help="HTTP status to answer with, e.g. 503")
+    parser.add_argument("--busy-rate", type=float, default=0.0, help="fraction of calls answered with 'device in use'")
+    args = parser.parse_args()
+
+    server = FakePiShockServer(args.port, args.latency, args.status, args.busy_rate)
+    print(f"Fake PiShock API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{len(server.requests)} operations received")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""A fake USB PiShock hub on a pseudo-terminal.
+
+Answers ``info`` like the firmware does and records every ``operate``, so
+``SHOCKER_TRANSPORT=serial`` can be tried without the hardware:
+
+    python -m benchmarks.fake_serial_pishock --shockers 420,421
+    SHOCKER_TRANSPORT=serial SHOCKER_PORT=/dev/pts/5 SHOCKER_CODE=420 python main.py
+
+Linux and macOS only, as it needs ``pty``.
+"""
+
+import argparse
+import json
+import os
+import pty
+import threading
+import time
+import tty
+
+
+class FakeSerialPiShock:
+    """The fake hub, ``port`` is the device path to open."""
+
+    def __init__(self, shocker_ids=(420,)):
+        self.shocker_ids = list(shocker_ids)
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.operations = []  # (time received, command value)
+        self._running = False
+        self._thread = None
+
+    def info(self) -> dict:
+        return {
+            "version": "3.1.1.231119.1556",
+            "type": 4,
+            "connected": True,
+            "clientId": 621,
+            "shockers": [{"id": i, "type": 1, "paused": False} for i in self.shocker_ids],
+        }
+
+    def start(self) -> "FakeSerialPiShock":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        buffer = b""
+        while self._running:
+            try:
+                chunk = os.read(self.master, 4096)
+            except OSError:
+                return
+            received = time.perf_counter()
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self._handle(line, received)
+
+    def _handle(self, line: bytes, received: float) -> None:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return
+        if command.get("cmd") == "info":
+            os.write(self.master, b"TERMINALINFO: " + json.dumps(self.info()).encode() + b"\n")
+        elif command.get("cmd") == "operate":
+            self.operations.append((received, command.get("value")))
+
+    def stop(self) -> None:
+        self._running = False
+        for fd in (self.slave, self.master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shockers", default="420", help="comma separated shocker ids")
+    args = parser.parse_args()
+
+    device = FakeSerialPiShock(int(i) for i in args.shockers.split(",")).start()
+    print(f"Fake PiShock hub on {device.port}")
+    try:
+        while True:
+            count = len(device.operations)
+            time.sleep(0.5)
+            for _, value in device.operations[count:]:
+                print(f"operate {value}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+
+
+if __name__ == "__main__":
+    main()
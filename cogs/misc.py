@@ -1,6 +1,10 @@
+import asyncio
+import os
 import time
 from typing import Optional
 from main import Shock
+from utils.cache import TTLCache
+from utils.metrics import METRICS, rest_seconds
 
 from discord.ext import commands
 import discord
@@ -9,6 +13,37 @@ import discord
 class Misc(commands.Cog):
     def __init__(self, bot: Shock):
         self.bot = bot
+        self.metrics_task = None
+        METRICS.gauge(
+            "discord_gateway_latency_seconds",
+            "Gateway heartbeat latency.",
+            lambda: self.bot.latency,
+        )
+        # users fetched for their banner, which the gateway usually leaves out
+        self.profiles = TTLCache(
+            max_size=int(os.getenv("PROFILE_CACHE_SIZE", 256)),
+            ttl=float(os.getenv("PROFILE_CACHE_TTL", 600)),
+        )
+        METRICS.gauge(
+            "discord_profile_cache_hit_rate",
+            "Share of banner lookups served without fetching the user.",
+            lambda: self.profiles.hit_rate,
+        )
+        METRICS.gauge(
+            "discord_profile_fetches",
+            "Users fetched over REST for their banner.",
+            lambda: self.profiles.misses,
+        )
+
+    async def cog_load(self):
+        path = os.getenv("METRICS_FILE", "bot_metrics.prom")
+        interval = float(os.getenv("METRICS_INTERVAL", 60))
+        if path and interval > 0:
+            self.metrics_task = asyncio.create_task(METRICS.export(path, interval))
+
+    async def cog_unload(self):
+        if self.metrics_task:
+            self.metrics_task.cancel()
 
     @commands.command(name="status")
     async def set_status(self, ctx, type: int, *, status: str):
@@ -60,18 +95,28 @@ class Misc(commands.Cog):
                 "```Error: Type must be a number (1, 2, 3, or 4).```"
             )
 
+    async def get_banner(self, user: discord.User) -> Optional[discord.Asset]:
+        """returns the user's banner, fetching the user only if it isn't known yet"""
+        if user.banner is not None:
+            return user.banner
+        profile = self.profiles.get(user.id)
+        if profile is None:
+            profile = await self.bot.fetch_user(user.id)
+            self.profiles.set(user.id, profile)
+        return profile.banner
+
     @commands.command()
     async def banner(self, ctx, user: Optional[discord.User] = None):
         """Displays a user's banner."""
         if not user:
             user = ctx.author
-        if user is not None:
-            user = await self.bot.fetch_user(user.id)
-        else:
+        try:
+            banner = await self.get_banner(user)
+        except discord.NotFound:
             await ctx.channel.send("```Error: User not found.```")
             return
-        if user.avatar is not None:
-            await ctx.channel.send(user.avatar.url)
+        if banner is not None:
+            await ctx.channel.send(banner.url)
         else:
             await ctx.channel.send("```Error: User does not have a banner set.```")
 
@@ -80,11 +125,7 @@ class Misc(commands.Cog):
         """Displays a user's avatar."""
         if not user:
             user = ctx.author
-        if user is not None:
-            user = await self.bot.fetch_user(user.id)
-        else:
-            await ctx.channel.send("```Error: User not found.```")
-            return
+        # the converter already resolved the user, avatars are always included
         if user.avatar is not None:
             await ctx.channel.send(user.avatar.url)
         else:
@@ -97,8 +138,14 @@ class Misc(commands.Cog):
         before = time.monotonic()
         message = await ctx.send("Pinging...")
         ping = (time.monotonic() - before) * 1000
+        rest_seconds.observe(ping / 1000)
         await message.edit(content=f"`{int(ping)} ms`")
 
+    @commands.command()
+    async def stats(self, ctx):
+        """shows latency and throughput stats."""
+        await ctx.channel.send(f"```{METRICS.render_text()}```")
+
     @commands.command()
     async def shutdown(self, ctx):
         """Shuts down the bot."""
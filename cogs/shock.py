@@ -1,9 +1,18 @@
-import json
+import asyncio
 import logging
 import os
+import time
 
 from main import Shock
-from pishock import PiShockAPI
+from utils.cache import TTLCache
+from utils.config import ConfigStore
+from utils.rules import TriggerRules
+from utils import metrics
+from utils.daemon import SOCKET_FILE, DaemonClient
+from utils.dispatch import ShockCommand, open_pool, parse_devices
+from utils.history import HISTORY_FILE, ShockEvent, ShockHistory, parse_filters
+from utils.patterns import PatternScheduler, Step, parse_patterns
+from utils.resilience import CircuitBreaker
 from discord.ext import commands
 from dotenv import load_dotenv
 
@@ -17,94 +26,325 @@ class Shocker(commands.Cog):
         self.shocker_username = os.getenv("SHOCKER_USERNAME")
         self.shocker_code = os.getenv("SHOCKER_CODE")
         self.shock_api = None
+        self.pool = None
+        self._shocker_key = None
+        self.history = None
+        self.config = ConfigStore(self.WHITELIST_FILE, self.WORDLIST_FILE)
+        self._rules = TriggerRules()
+        self._rules_key = None
+        self._patterns = {}
+        self.patterns = PatternScheduler(self._send_step)
+        # message id -> (content hash, triggers found), so replayed events and
+        # edits that don't change the triggers never shock twice
+        self.processed = TTLCache(
+            max_size=int(os.getenv("MESSAGE_CACHE_SIZE", 4096)),
+            ttl=float(os.getenv("MESSAGE_CACHE_TTL", 900)),
+        )
+        metrics.METRICS.gauge(
+            "shock_message_cache_hits",
+            "Lookups that found the message in the message cache.",
+            lambda: self.processed.hits,
+        )
+        metrics.METRICS.gauge(
+            "shock_message_cache_evictions",
+            "Messages pushed out of the full message cache.",
+            lambda: self.processed.evictions,
+        )
+        metrics.METRICS.gauge(
+            "shock_queue_depth",
+            "Shocks waiting in the dispatch queues.",
+            lambda: sum(queue.depth for queue in self.queues.values()),
+        )
+        metrics.METRICS.gauge(
+            "shock_queue_dropped",
+            "Shocks dropped by full dispatch queues.",
+            lambda: sum(queue.dropped for queue in self.queues.values()),
+        )
+        metrics.METRICS.gauge(
+            "pishock_breaker_open",
+            "1 while the PiShock circuit breaker is failing fast, 0.5 while half-open.",
+            lambda: {"open": 1, "half-open": 0.5}.get(self.breaker_state, 0),
+        )
+
+    # PiShock client settings, the client is only replaced when one changes
+    SHOCKER_SETTINGS = (
+        "SHOCKER_TRANSPORT",
+        "SHOCKER_PORT",
+        "DISPATCH_SOCKET",
+        "PISHOCK_API_URL",
+        "PISHOCK_TIMEOUT",
+        "PISHOCK_MAX_IN_FLIGHT",
+        "PISHOCK_RETRIES",
+        "PISHOCK_BREAKER_FAILURES",
+        "PISHOCK_BREAKER_RESET",
+        "SHOCK_WINDOW",
+        "SHOCK_POLICY",
+        "SHOCK_RATE",
+        "SHOCK_BURST",
+    )
+    TRANSPORTS = ("http", "serial", "daemon")
+    # what a reload hands over to the new cog: the live client and its
+    # queues, the history writer, the duplicate cache and running patterns
+    CARRYOVER = ("shock_api", "pool", "_shocker_key", "history", "processed", "patterns")
 
     async def init_shocker(self):
-        if not (self.shocker_apikey and self.shocker_username and self.shocker_code):
+        """creates the PiShock client, reusing the existing one if the credentials haven't changed
+
+        ``SHOCKER_TRANSPORT=serial`` talks to a USB-attached hub on ``SHOCKER_PORT``
+        instead of the cloud API, with shocker ids in ``SHOCKER_CODE``.
+        ``SHOCKER_TRANSPORT=daemon`` hands every command to ``dispatchd.py``.
+        """
+        transport = os.getenv("SHOCKER_TRANSPORT", "http")
+        if transport not in self.TRANSPORTS:
+            logging.error(
+                f"Error: Unknown SHOCKER_TRANSPORT `{transport}`, use {', '.join(self.TRANSPORTS)}."
+            )
+            return
+        if not self.shocker_code or (
+            transport == "http" and not (self.shocker_apikey and self.shocker_username)
+        ):
             logging.error("Error: Shocker API data not set.")
             return
-        self.shock_api = PiShockAPI(self.shocker_username, self.shocker_apikey)
-        logging.info("Shocker API initialized.")
 
-    @commands.Cog.listener()
-    async def on_ready(self):
+        try:
+            devices = parse_devices(self.shocker_code)
+        except ValueError as e:
+            logging.error(f"Error: {e}")
+            return
+
+        key = (
+            self.shocker_username,
+            self.shocker_apikey,
+            tuple(devices),
+            *(os.getenv(name) for name in self.SHOCKER_SETTINGS),
+        )
+        if self.pool and key == self._shocker_key:
+            return
+        await self.close_shocker()
+
+        if transport == "daemon":
+            self.pool = DaemonClient(
+                os.getenv("DISPATCH_SOCKET", SOCKET_FILE), devices, self.on_breaker_change
+            )
+        else:
+            try:
+                self.pool = await open_pool(
+                    devices,
+                    self.shocker_username,
+                    self.shocker_apikey,
+                    self.on_breaker_change,
+                    transport,
+                )
+            except Exception as e:
+                logging.error(f"Error: Could not initialize the shocker over {transport}: {e}")
+                return
+            self.shock_api = self.pool.api
+        self._shocker_key = key
+        logging.info(f"Shocker API initialized for {len(devices)} device(s) over {transport}.")
+
+    async def close_shocker(self):
+        if self.pool:
+            self.pool.close()
+        self.pool = None
+        self.shock_api = None
+
+    @property
+    def queues(self) -> dict:
+        return self.pool.queues if self.pool else {}
+
+    @property
+    def breaker_state(self) -> str:
+        return self.pool.breaker.state if self.pool else CircuitBreaker.CLOSED
+
+    def on_breaker_change(self, state: str) -> None:
+        self.bot.status_writer.publish(pishock=state)
+        self.bot.status_writer.event(f"PiShock API circuit {state}")
+
+    async def cog_load(self):
+        state = self.bot.carryover.get(__name__)
+        if state:
+            self.__dict__.update(state)
+            self.patterns.send = self._send_step
+            if self.pool:
+                self.pool.breaker.on_change = self.on_breaker_change
+            self._compile_rules()
+            return
+
+        # runs before the gateway connects, so the first trigger finds
+        # the client, config and matcher ready
+        await self.init_shocker()
+        self._compile_rules()
+        path = os.getenv("HISTORY_FILE", HISTORY_FILE)
+        if path:
+            try:
+                self.history = await asyncio.to_thread(ShockHistory, path)
+            except Exception as e:
+                logging.error(f"Error opening shock history: {e}")
+
+    async def cog_unload(self):
+        if self.bot.reloading:
+            self.bot.carryover[__name__] = {name: getattr(self, name) for name in self.CARRYOVER}
+            self.config.close()
+            return
+
+        self.patterns.close()
+        await self.close_shocker()
+        self.config.close()
+        if self.history:
+            self.history.close()
+
+    async def reload_config(self) -> None:
+        """re-reads ``.env`` and the config files, keeping the PiShock client unless its settings changed"""
+        # a >setshocker from the last second may not be on disk yet, and
+        # reading the file before it is would roll it back
+        await asyncio.to_thread(self.config.flush)
+        load_dotenv(override=True)
+        self.shocker_apikey = os.getenv("SHOCKER_APIKEY")
+        self.shocker_username = os.getenv("SHOCKER_USERNAME")
+        self.shocker_code = os.getenv("SHOCKER_CODE")
+        self.config.invalidate()
+        self._rules_key = None
+        self._compile_rules()
         await self.init_shocker()
 
     WORDLIST_FILE = "wordlist.json"
     WHITELIST_FILE = "whitelist.json"
 
-    def load_json(self, file_path):
-        try:
-            with open(file_path, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
-            logging.error(f"Error loading JSON: {e}")
-            return None
-        except FileNotFoundError:
-            logging.error(f"Error: File {file_path} not found.")
-            return None
-
-    def save_json(self, filename: str, data: dict | list) -> None:
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=4)
+    def _compile_rules(self) -> TriggerRules:
+        """rebuilds the trigger rules and patterns, only when the word or whitelist was reloaded"""
+        key = (self.config.words, self.config.whitelist)
+        if self._rules_key is None or any(a is not b for a, b in zip(key, self._rules_key)):
+            self._rules = TriggerRules(self.config.wordlist_data, self.config.whitelist_data)
+            self._patterns = parse_patterns(self.config.wordlist_data.get("patterns"))
+            self._rules_key = key
+        return self._rules
+
+    @property
+    def rules(self) -> TriggerRules:
+        """the compiled trigger rules"""
+        return self._compile_rules()
+
+    @property
+    def pattern_steps(self) -> dict[str, tuple[Step, ...]]:
+        """the ``patterns`` in the wordlist, reloaded along with the rules"""
+        self._compile_rules()
+        return self._patterns
 
     @commands.Cog.listener()
     async def on_message(self, message):
         """handles the shocker custom messages"""
+        start = time.perf_counter()
+        metrics.messages_seen.inc()
+
+        match = None
+        if self.in_scope(message):
+            if self.processed.get(message.id) is not None:
+                # the gateway replayed a message we already handled
+                metrics.messages_duplicate.inc()
+                return
+            rules = self.rules
+            matches = []
+            if rules:
+                match_start = time.perf_counter()
+                # one pass finds the trigger to act on and every trigger to remember for edits
+                matches = rules.find_all(message.content)
+                metrics.match_seconds.observe(time.perf_counter() - match_start)
+            match = matches[0] if matches else None
+            triggers = frozenset(m.word.lower() for m in matches)
+            self.processed.set(message.id, (hash(message.content), triggers))
+        metrics.on_message_seconds.observe(time.perf_counter() - start)
+
+        if match:
+            metrics.messages_matched.inc()
+            await self.shock_message(message, match)
 
-        data = self.load_json(self.WHITELIST_FILE)
-        whitelist = data.get("whitelist", []) if data else []
-        if message.author.id not in whitelist:
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """shocks for triggers an edit added, ignoring edits that leave the triggers as they were
+
+        The raw event fires for messages outside the client's message cache,
+        which the lean profile keeps small. What the message said before is
+        looked up in ``processed``, so edits to messages it no longer
+        remembers are ignored.
+        """
+        seen = self.processed.get(payload.message_id)
+        if seen is None or "content" not in payload.data:
             return
-
-        wordlist = self.load_json(self.WORDLIST_FILE)
-        if not wordlist:
+        content_hash = hash(payload.data["content"])
+        if seen[0] == content_hash:
+            # embeds resolving or pins also count as edits
+            metrics.messages_duplicate.inc()
             return
-
-        if any(word in message.content.lower() for word in wordlist.get("words", [])):
-            await self.shock_message(self, message)
-
-    async def shock_message(self, ctx, message: str):
-
-        wordlist = self.load_json(self.WORDLIST_FILE)
-
-        if wordlist and [0] not in wordlist.get("words", []):
+        after = self._edited_message(payload)
+        if after is None or not self.in_scope(after):
             return
 
-        if len(message) < 3:
-            await ctx.channel.send(
-                "```Error: Invalid message format! Expected format: (word) (shock value) (duration) ex. shock 10 5```"
-            )
-            return
+        rules = self.rules
+        matches = rules.find_all(after.content) if rules else []
+        triggers = frozenset(m.word.lower() for m in matches)
+        self.processed.set(after.id, (content_hash, triggers))
+
+        added = next((m for m in matches if m.word.lower() not in seen[1]), None)
+        if added is None:
+            metrics.messages_duplicate.inc()
+        else:
+            metrics.messages_matched.inc()
+            await self.shock_message(after, added)
+
+    def in_scope(self, message) -> bool:
+        """whether the author may trigger where the message was sent, checked before anything else"""
+        access = self.config.whitelist
+        user_id = message.author.id
+        if user_id not in access:
+            return False
+        channel = message.channel
+        return access.allows(
+            user_id,
+            message.guild.id if message.guild else None,
+            channel.id,
+            getattr(channel, "parent_id", None),
+        )
 
+    def _edited_message(self, payload):
+        """the edited message built from the raw event, or None for partial updates"""
+        channel = self.bot.get_channel(payload.channel_id)
+        if channel is None:
+            return None
         try:
-            shock_value, duration = int(message[1]), int(message[2])
-            if not (1 <= shock_value <= 100) or not (1 <= duration <= 15):
-                raise ValueError
-
-            await self.send_shock(ctx, duration, shock_value)
+            return self.bot._connection.create_message(channel=channel, data=payload.data)
+        except KeyError:
+            return None
 
+    async def shock_message(self, message, match):
+        """sends the shock for a matched trigger, using `(word) (shock value) (duration)` if given"""
+        start = time.perf_counter()
+        try:
+            action = self.rules.action(match, message.content, message.author.id)
         except ValueError:
-            await ctx.channel.send(
+            await message.channel.send(
                 "```Error: Invalid format. Ensure shock (1-100) and duration (1-15).```"
             )
+            return
+
+        metrics.parse_seconds.observe(time.perf_counter() - start)
+        if action.pattern:
+            await self.play_pattern(message, action.pattern)
+            return
+        await self.send_shock(
+            message, action.duration, action.intensity, action.mode, word=action.word
+        )
 
     @commands.command(name="setshocker")
     async def set_shocker(self, ctx, apikey: str, code: str):
         """sets your shocker configuration"""
-        os.environ["SHOCKER_APIKEY"] = apikey
-        os.environ["SHOCKER_CODE"] = code
-
-        with open(".env", "a") as f:
-            f.write(f"SHOCKER_APIKEY={apikey}\nSHOCKER_CODE={code}\n")
+        self.config.set_env(SHOCKER_APIKEY=apikey, SHOCKER_CODE=code)
 
         await ctx.channel.send("```Shocker API key and code set successfully!```")
 
     @commands.command(name="username")
     async def set_username(self, ctx, username: str):
         """sets your shocker username"""
-        os.environ["SHOCKER_USERNAME"] = username
-        with open(".env", "a") as f:
-            f.write(f"SHOCKER_USERNAME={username}\n")
+        self.config.set_env(SHOCKER_USERNAME=username)
 
         await ctx.channel.send(f"```Username `{username}` set successfully!```")
 
@@ -115,6 +355,11 @@ class Shocker(commands.Cog):
         code = os.getenv("SHOCKER_CODE")
         username = os.getenv("SHOCKER_USERNAME")
 
+        if os.getenv("SHOCKER_TRANSPORT") == "serial":
+            port = self.shock_api.port if self.shock_api else os.getenv("SHOCKER_PORT") or "auto"
+            await ctx.channel.send(f"```Serial port: {port}\nShocker IDs: {code}```")
+            return
+
         if not all([apikey, code, username]):
             await ctx.channel.send(
                 "```Error: API key, code, or username not set! Set them with `>set <Apikey> <Code>` and or `>setusername <username>```"
@@ -128,29 +373,20 @@ class Shocker(commands.Cog):
     @commands.command(name="add")
     async def add_word(self, ctx, word: str):
         """adds word to the custom shock words"""
-        wordlist = self.load_json(self.WORDLIST_FILE) or {"words": []}
-        if word in wordlist["words"]:
+        if not self.config.add_word(word):
             await ctx.channel.send(f"```Word `{word}` is already in the list.```")
             return
 
-        wordlist["words"].append(word)
-        self.save_json(self.WORDLIST_FILE, wordlist)
-
         await ctx.channel.send(f"```Word `{word}` has been added!```")
 
     @commands.command()
     async def remove_word(self, ctx, word: str):
         """removes word from the custom list"""
 
-        wordlist = self.load_json(self.WORDLIST_FILE) or {"words": []}
-
-        if word not in wordlist["words"]:
+        if not self.config.remove_word(word):
             await ctx.channel.send(f"```Error: Word `{word}` is not in the list.```")
             return
 
-        wordlist["words"].remove(word)
-        self.save_json(self.WORDLIST_FILE, wordlist)
-
         await ctx.channel.send(f"```Word `{word}` has been removed!```")
 
     @commands.command()
@@ -159,9 +395,11 @@ class Shocker(commands.Cog):
 
         await self.send_shock(ctx, duration, intensity)
 
-    async def send_shock(self, ctx, duration: int, intensity: int) -> None:
-        """Sends a shock."""
-        if not self.shock_api:
+    async def send_shock(
+        self, ctx, duration: int, intensity: int, mode: str = "shock", word: str = None
+    ) -> None:
+        """Sends a shock, or a vibrate/beep if the trigger's rule says so."""
+        if not self.pool:
             await ctx.channel.send("```Error: Shocker API not initialized!```")
             return
 
@@ -169,18 +407,200 @@ class Shocker(commands.Cog):
             await ctx.channel.send("```Error: Intensity must be between 1 and 100.```")
             return
 
-        try:
-            if self.shocker_code:
-                self.shock_api.shocker(self.shocker_code).shock(
-                    duration=duration, intensity=intensity
+        if not self.pool.devices:
+            await ctx.channel.send("```Error: Shocker code is not set!```")
+            return
+
+        start = time.perf_counter()
+        results = await self.pool.send(mode, duration, intensity)
+        metrics.queue_seconds.observe(time.perf_counter() - start)
+        if self.history:
+            self.record_history(ctx, word, ShockCommand(mode, duration, intensity), results)
+
+        # merged and dropped requests stay quiet so a spammed trigger
+        # doesn't turn into spammed replies
+        lines = []
+        for outcome in results:
+            prefix = f"{outcome.device.code}: " if len(results) > 1 else ""
+            if outcome.error is not None:
+                lines.append(f"{prefix}Error: {str(outcome.error)}")
+            elif outcome.result.status == "sent":
+                command = outcome.result.command
+                self.bot.status_writer.event(
+                    f"{prefix}{command.mode.capitalize()} {command.intensity} for {command.duration}s"
+                    f" ({outcome.result.batch_size} merged)"
+                )
+                lines.append(
+                    f"{prefix}{command.mode.capitalize()} sent with duration: {command.duration}s and intensity: {command.intensity}"
                 )
+        if lines:
+            await ctx.channel.send("```" + "\n".join(lines) + "```")
+
+    def record_history(self, ctx, word, command: ShockCommand, results) -> None:
+        now = time.time()
+        for outcome in results:
+            requested = outcome.device.limit(command)
+            if outcome.error is not None:
+                result = f"error: {outcome.error}"
             else:
-                await ctx.channel.send("```Error: Shocker code is not set!```")
-            await ctx.channel.send(
-                f"```Shock sent with duration: {duration}s and intensity: {intensity}```"
+                result = outcome.result.status
+            self.history.record(
+                ShockEvent(
+                    now,
+                    ctx.author.id,
+                    word.lower() if word else None,
+                    requested.mode,
+                    requested.intensity,
+                    requested.duration,
+                    outcome.device.code,
+                    result,
+                )
+            )
+
+    @commands.command()
+    async def history(self, ctx, *filters: str):
+        """shows recent shocks, filtered with user=<@user> word=<word> since=<2h> until=<1h> limit=<10>"""
+        if not self.history:
+            await ctx.channel.send("```Error: Shock history is disabled.```")
+            return
+
+        try:
+            query = parse_filters(filters)
+        except ValueError as e:
+            await ctx.channel.send(f"```Error: {e}```")
+            return
+        query["limit"] = max(1, min(query.get("limit", 10), 15))
+
+        events = await self.history.query(**query)
+        if not events:
+            await ctx.channel.send("```No shocks found.```")
+            return
+
+        lines = []
+        for event in events:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event.ts))
+            lines.append(
+                f"{when} {event.user_id} {event.word or '-'}: {event.mode} {event.intensity} for"
+                f" {event.duration}s on {event.device}, {event.result[:60]}"
             )
-        except Exception as e:
-            await ctx.channel.send(f"```Error: {str(e)}```")
+        await ctx.channel.send("```" + "\n".join(lines) + "```")
+
+    async def play_pattern(self, ctx, name: str) -> None:
+        steps = self.pattern_steps.get(name.lower())
+        if not steps:
+            await ctx.channel.send(f"```Error: Pattern `{name}` not found.```")
+            return
+        if not self.pool:
+            await ctx.channel.send("```Error: Shocker API not initialized!```")
+            return
+
+        if not self.patterns.start(name.lower(), steps, ctx, name.lower()):
+            await ctx.channel.send("```Error: Too many patterns queued, use `>stop` first.```")
+            return
+        length = sum(step.duration + step.gap for step in steps)
+        self.bot.status_writer.event(f"Pattern {name.lower()} ({len(steps)} steps, {length:g}s)")
+        await ctx.channel.send(
+            f"```Pattern `{name.lower()}` queued: {len(steps)} steps over {length:g}s.```"
+        )
+
+    async def _send_step(self, step: Step, ctx, name: str) -> None:
+        """sends one pattern step, within the user's caps, straight to the devices"""
+        if not self.pool:
+            return
+        intensity, duration = step.intensity, step.duration
+        cap = self.rules.caps.get(ctx.author.id)
+        if cap:
+            intensity = min(intensity, cap[0])
+            duration = min(duration, cap[1])
+
+        results = await self.pool.send_direct(step.mode, duration, intensity)
+        if self.history:
+            self.record_history(
+                ctx, name, ShockCommand(step.mode, duration, intensity), results
+            )
+        for outcome in results:
+            if outcome.error is not None:
+                logging.error(f"Error sending pattern step to {outcome.device.code}: {outcome.error}")
+
+    @commands.command()
+    async def pattern(self, ctx, name: str = None):
+        """plays a pattern from the wordlist, or lists them"""
+        if name is None:
+            if not self.pattern_steps:
+                await ctx.channel.send("```No patterns set.```")
+                return
+            lines = [
+                f"{name}: " + ", ".join(f"{s.mode} {s.intensity}/{s.duration}s" for s in steps)
+                for name, steps in self.pattern_steps.items()
+            ]
+            await ctx.channel.send("```" + "\n".join(lines) + "```")
+            return
+
+        await self.play_pattern(ctx, name)
+
+    @commands.command()
+    async def stop(self, ctx):
+        """stops the running pattern and clears the queued ones"""
+        stopped = self.patterns.stop()
+        if not stopped:
+            await ctx.channel.send("```No pattern is playing.```")
+            return
+        await ctx.channel.send(f"```Stopped {stopped} pattern(s).```")
+
+    @commands.command()
+    async def reload(self, ctx, cog: str = None):
+        """reloads a cog (or all of them) from cogs/ without reconnecting"""
+        cogs = [cog] if cog else [name.split(".", 1)[1] for name in self.bot.extensions]
+        lines = []
+        for name in cogs:
+            try:
+                seconds = await self.bot.reload_cog(name)
+            except commands.ExtensionError as e:
+                logging.error(f"Error reloading {name}: {e}")
+                lines.append(f"Error: {e} Kept the previous version.")
+            else:
+                lines.append(f"Reloaded {name} in {seconds * 1000:.1f} ms.")
+        self.bot.status_writer.event("; ".join(lines))
+        await ctx.channel.send("```" + "\n".join(lines) + "```")
+
+    @commands.command(name="reloadconfig")
+    async def reload_config_command(self, ctx):
+        """re-reads .env, the wordlist and whitelist without reconnecting"""
+        start = time.perf_counter()
+        await self.reload_config()
+        if not self.pool:
+            await ctx.channel.send("```Error: Config reloaded, but the shocker API could not be initialized.```")
+            return
+        await ctx.channel.send(
+            f"```Config reloaded in {(time.perf_counter() - start) * 1000:.1f} ms.```"
+        )
+
+    @commands.command()
+    async def queue(self, ctx):
+        """shows the dispatch queue stats"""
+        if not self.pool:
+            await ctx.channel.send("```Error: Shocker API not initialized!```")
+            return
+
+        lines = []
+        if isinstance(self.pool, DaemonClient):
+            try:
+                stats = await self.pool.stats()
+            except (OSError, RuntimeError) as e:
+                await ctx.channel.send(f"```Error: {e}```")
+                return
+            queues, api = stats.pop("queues"), stats.pop("api")
+            lines.append("daemon: " + ", ".join(f"{k}: {v}" for k, v in stats.items()))
+        else:
+            queues = {code: queue.stats() for code, queue in self.queues.items()}
+            api = self.pool.resilience.stats()
+
+        for code, queue_stats in queues.items():
+            stats = ", ".join(f"{k}: {v}" for k, v in queue_stats.items())
+            lines.append(f"{code}: {stats}")
+        stats = ", ".join(f"{k}: {v}" for k, v in api.items())
+        lines.append(f"api: {stats}")
+        await ctx.channel.send("```" + "\n".join(lines) + "```")
 
 
 async def setup(bot: Shock):
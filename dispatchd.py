@@ -0,0 +1,71 @@
+"""Dispatch daemon that owns the PiShock connection in its own process.
+
+With ``SHOCKER_TRANSPORT=daemon`` the bot only matches triggers and sends
+the resulting commands here over a Unix socket, so restarting or crashing
+the bot doesn't drop shocks in flight or the PiShock session. Commands are
+kept in an on-disk spool until they're sent, see ``utils.spool``.
+
+    python dispatchd.py
+    python dispatchd.py --socket /tmp/pishock.sock --freshness 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from dotenv import load_dotenv
+
+from utils.daemon import SOCKET_FILE, DispatchDaemon
+from utils.dispatch import open_pool, parse_devices
+from utils.spool import SPOOL_FILE, CommandSpool
+
+
+async def run(args) -> None:
+    devices = parse_devices(os.getenv("SHOCKER_CODE"))
+    username, apikey = os.getenv("SHOCKER_USERNAME"), os.getenv("SHOCKER_APIKEY")
+    # SHOCKER_TRANSPORT is the bot's, and says to use this daemon
+    transport = os.getenv("DISPATCH_TRANSPORT", "http")
+    if transport not in ("http", "serial"):
+        raise SystemExit(f"Error: Unknown DISPATCH_TRANSPORT `{transport}`, use http or serial.")
+    if not devices or (transport != "serial" and not (username and apikey)):
+        raise SystemExit("Error: Shocker API data not set.")
+
+    pool = await open_pool(devices, username, apikey, transport=transport)
+    daemon = DispatchDaemon(pool, CommandSpool(args.spool, args.freshness))
+    await daemon.start(args.socket)
+    logging.info(
+        f"Dispatching to {len(devices)} device(s) on {args.socket}, {daemon.replayed} replayed."
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    logging.info("Stopping.")
+    await daemon.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=os.getenv("DISPATCH_SOCKET", SOCKET_FILE))
+    parser.add_argument("--spool", default=os.getenv("DISPATCH_SPOOL", SPOOL_FILE))
+    parser.add_argument(
+        "--freshness",
+        type=float,
+        default=float(os.getenv("DISPATCH_FRESHNESS", 30)),
+        help="seconds after which unsent commands aren't replayed after a crash",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(run(args))
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
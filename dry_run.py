@@ -0,0 +1,150 @@
+"""Dry run of the trigger rules over an exported chat log.
+
+Streams a JSON or JSON lines export (e.g. from DiscordChatExporter) through
+the same whitelist and trigger rules the shock cog uses, and reports what
+would have been sent. Nothing connects to Discord or PiShock.
+
+    python dry_run.py export.json
+    python dry_run.py export.jsonl --wordlist candidate.json --shocks 50
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from utils.config import ConfigCache
+from utils.export import ChatExport, author_id, author_name, places
+from utils.rules import TriggerRules
+
+
+def open_export(args, rules: TriggerRules, whitelist) -> ChatExport:
+    """opens the export, skipping messages that can't trigger as early as possible"""
+    words = [word.lower() for word in rules.matcher.words]
+    # JSON can escape non-ASCII, quotes and backslashes, and normalized words
+    # can be spelled any way, so those can't be searched for in the raw text
+    if rules.normalized_matcher or not all(
+        word.isascii() and '"' not in word and "\\" not in word for word in words
+    ):
+        words = []
+    required = []
+    if not args.all_users:
+        required.append(re.compile("|".join(str(user_id) for user_id in whitelist)))
+    return ChatExport(args.export, words, required)
+
+
+def run(args) -> dict:
+    config = ConfigCache(args.whitelist, args.wordlist)
+    rules = TriggerRules(config.wordlist_data, config.whitelist_data)
+    whitelist = config.whitelist
+    if not rules:
+        raise SystemExit(f"Error: {args.wordlist} has no words.")
+
+    if not args.all_users and not whitelist:
+        raise SystemExit(f"Error: {args.whitelist} has no users, use --all-users.")
+    export = open_export(args, rules, whitelist)
+
+    stats = {
+        "messages": 0,
+        "matched": 0,
+        "invalid": 0,
+        "words": Counter(),
+        "users": Counter(),
+        "names": {},
+        "shocks": [],
+    }
+    shocks_out = open(args.shocks_out, "w", encoding="utf-8") if args.shocks_out else None
+    try:
+        for message in export:
+            user_id = author_id(message)
+            if not args.all_users:
+                if user_id not in whitelist:
+                    continue
+                # guild and channel limits only apply where the export says where it was sent
+                where = places(message)
+                if where and not whitelist.allows(user_id, *where):
+                    continue
+            content = message.get("content")
+            if not content:
+                continue
+            match = rules.match(content)
+            if not match:
+                continue
+
+            stats["matched"] += 1
+            stats["words"][match.word] += 1
+            stats["users"][user_id] += 1
+            stats["names"].setdefault(user_id, author_name(message))
+            try:
+                action = rules.action(match, content, user_id)
+            except ValueError:
+                stats["invalid"] += 1
+                continue
+
+            shock = {
+                "timestamp": message.get("timestamp"),
+                "user_id": user_id,
+                "word": action.word,
+                "mode": action.mode,
+                "intensity": action.intensity,
+                "duration": action.duration,
+            }
+            if len(stats["shocks"]) < args.shocks:
+                stats["shocks"].append(shock)
+            if shocks_out:
+                shocks_out.write(json.dumps(shock) + "\n")
+    finally:
+        if shocks_out:
+            shocks_out.close()
+    stats["messages"] = export.read
+    return stats
+
+
+def report(args, stats, elapsed: float, size: int) -> None:
+    print(f"messages:  {stats['messages']} in {elapsed:.2f}s ({size / elapsed / 1e6:.0f} MB/s)")
+    print(f"triggers:  {stats['matched']} ({stats['invalid']} with invalid values, not sent)")
+
+    print("\nby word:")
+    for word, count in stats["words"].most_common(args.top):
+        print(f"  {count:>8}  {word}")
+
+    print("\nby user:")
+    for user_id, count in stats["users"].most_common(args.top):
+        name = stats["names"].get(user_id)
+        print(f"  {count:>8}  {user_id}" + (f" ({name})" if name else ""))
+
+    if stats["shocks"]:
+        print(f"\nfirst {len(stats['shocks'])} shocks:")
+        for shock in stats["shocks"]:
+            print(
+                f"  {shock['timestamp'] or '-'}  {shock['user_id']}  {shock['word']}:"
+                f" {shock['mode']} {shock['intensity']} for {shock['duration']}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("export", help="JSON or JSON lines chat export")
+    parser.add_argument("--wordlist", default="wordlist.json")
+    parser.add_argument("--whitelist", default="whitelist.json")
+    parser.add_argument("--all-users", action="store_true", help="ignore the whitelist")
+    parser.add_argument("--top", type=int, default=20, help="words and users to list")
+    parser.add_argument("--shocks", type=int, default=20, help="shocks to list")
+    parser.add_argument("--shocks-out", help="write every shock to this file as JSON lines")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        stats = run(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    elapsed = time.perf_counter() - start
+    report(args, stats, elapsed, os.path.getsize(args.export))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,70 @@
-import re
-import time
 import customtkinter as ctk
-import subprocess
 import os
-import json
 import psutil
 from dotenv import load_dotenv
 from tkinter import messagebox
 from datetime import datetime
+from utils.config import ConfigStore
+from utils.status import StatusReader
+from utils.supervisor import BotSupervisor
 
 load_dotenv()
+status_reader = StatusReader()
+config = ConfigStore()
+# the bot writes and rotates bot_log.log itself, bot_output.log only catches
+# output from before its logging is set up
+supervisor = BotSupervisor("main.py", output_file="bot_output.log")
 
 
-def load_json(filename) -> dict:
-    """Load data from a JSON file."""
-    try:
-        if os.path.exists(filename):
-            with open(filename, "r") as file:
-                return json.load(file)
-        return {}
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading {filename}: {e}")
-        return {}
-
+def start_bot() -> None:
+    """Starts the bot"""
+    if not check_settings():
+        return
 
-def save_json(filename, data) -> None:
-    """Save data to a JSON file."""
     try:
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
-    except Exception as e:
-        print(f"Error saving {filename}: {e}")
+        if supervisor.running:
+            supervisor.restart()
+        else:
+            supervisor.start()
+        messagebox.showinfo("Success", "Bot started.")
 
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to start the bot: {str(e)}")
 
-def terminate_bot_processes() -> None:
-    """checks/Terminates any existing bot processes."""
-    current_directory = os.getcwd()
 
-    for proc in psutil.process_iter(["pid", "name", "exe", "cmdline"]):
-        try:
-            if (
-                proc.info["name"] in ["python", "python3"]
-                and "main.py" in proc.info["cmdline"]
-            ):
-                if proc.info["exe"] and current_directory in proc.info["exe"]:
-                    print(
-                        f"Terminating process: {proc.info['pid']}, {proc.info['cmdline']}"
-                    )
-                    proc.terminate()
-                    break
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
+def stop_bot() -> None:
+    """Stops the bot"""
+    supervisor.stop()
 
 
-def start_bot() -> None:
-    """Starts the bot"""
+def restart_bot() -> None:
+    """Restarts the bot"""
     if not check_settings():
         return
+    supervisor.restart()
+
 
+def watch_bot() -> None:
+    """Polls the bot process for exits and pending restarts"""
     try:
-        terminate_bot_processes()
-        log_file = open("bot_log.log", "a")
-
-        global bot_start_time
-        bot_start_time = datetime.now()
-
-        process = subprocess.Popen(
-            ["python3", "main.py"],
-            cwd=os.getcwd(),
-            env=os.environ.copy(),
-            stdout=log_file,
-            stderr=log_file,
-        )
+        code = supervisor.poll()
+    except Exception as e:
+        custom_error(f"Failed to restart the bot: {str(e)}")
+        code = None
 
-        messagebox.showinfo("Success", "Bot started.")
-        time.sleep(3)
-        root.after(500, update_bot_username)
+    text = f"Process: {supervisor.state}"
+    if supervisor.pid:
+        text += f" (pid {supervisor.pid})"
+    if supervisor.last_exit_code is not None:
+        text += f", last exit code {supervisor.last_exit_code}"
+    if supervisor.restarts:
+        text += f", {supervisor.restarts} restarts"
+    process_label.configure(text=text)
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to start the bot: {str(e)}")
+    if code is not None:
+        bot_username_label.configure(text="Bot Username: not running")
+
+    root.after(500, watch_bot)
 
 
 def save_settings() -> None:
@@ -89,23 +75,21 @@ def save_settings() -> None:
         shock_code = shock_code_entry.get()
         token = token_entry.get()
 
-        with open(".env", "w") as f:
-            f.write(f"SHOCKER_APIKEY={api_key}\n")
-            f.write(f"SHOCKER_USERNAME={username}\n")
-            f.write(f"SHOCKER_CODE={shock_code}\n")
-            f.write(f"DISCORD_TOKEN={token}\n")
-
-        whitelist_data = {
-            "whitelist": [
-                int(user_id.strip()) for user_id in whitelist_entry.get().split(",")
-            ]
-        }
-        wordlist_data = {
-            "words": [word.strip() for word in wordlist_entry.get().split(",")]
-        }
-
-        save_json("whitelist.json", whitelist_data)
-        save_json("wordlist.json", wordlist_data)
+        config.set_env(
+            SHOCKER_APIKEY=api_key,
+            SHOCKER_USERNAME=username,
+            SHOCKER_CODE=shock_code,
+            DISCORD_TOKEN=token,
+        )
+        config.set_whitelist(
+            int(user_id.strip())
+            for user_id in whitelist_entry.get().split(",")
+            if user_id.strip()
+        )
+        config.set_words(
+            word.strip() for word in wordlist_entry.get().split(",") if word.strip()
+        )
+        config.flush()
 
         messagebox.showinfo("Success", "Settings saved successfully!")
 
@@ -168,49 +152,58 @@ def autofill_settings() -> None:
     shock_code = os.getenv("SHOCKER_CODE")
     token = os.getenv("DISCORD_TOKEN")
 
-    whitelist_data = load_json("whitelist.json")
-    wordlist_data = load_json("wordlist.json")
-
     api_key_entry.insert(0, api_key or "")
     username_entry.insert(0, username or "")
     shock_code_entry.insert(0, shock_code or "")
     token_entry.insert(0, token or "")
 
-    if "whitelist" in whitelist_data:
-        whitelist_entry.insert(
-            0, ", ".join(str(user_id) for user_id in whitelist_data["whitelist"])
-        )
-    if "words" in wordlist_data:
-        wordlist_entry.insert(0, ", ".join(wordlist_data["words"]))
+    whitelist_entry.insert(
+        0, ", ".join(str(user_id) for user_id in config.whitelist_ids)
+    )
+    wordlist_entry.insert(0, ", ".join(config.words))
+
+
+def bot_status() -> dict:
+    """returns the status published by the bot, or {} if it isn't running"""
+    status = status_reader.read()
+    pid = status.get("pid")
+    if not pid or (pid != supervisor.pid and not psutil.pid_exists(pid)):
+        return {}
+    return status
 
 
 def update_bot_username() -> None:
-    """Update the bot's username on login"""
-    with open("bot_log.log", "r") as log_file:
-        log_lines = log_file.readlines()
-    # hacky but eh
-    bot_username = None
-    for line in reversed(log_lines):
-        match = re.search(r"Logged on as (\S+#\d+)", line)
-        if match:
-            bot_username = match.group(1)
-            break
-
-    if bot_username:
-        bot_username_label.configure(text=f"Logged in as: {bot_username}")
-        return
+    """Update the bot's username and connection state"""
+    status = bot_status()
+    if status.get("user"):
+        bot_username_label.configure(
+            text=f"Logged in as: {status['user']} ({status.get('state')})"
+        )
+    elif status:
+        bot_username_label.configure(text=f"Bot Username: {status.get('state')}...")
+    else:
+        bot_username_label.configure(text="Bot Username: not running")
+
+    events = status.get("events")
+    if events:
+        last = events[-1]
+        stamp = datetime.fromtimestamp(last["ts"]).strftime("%H:%M:%S")
+        event_label.configure(text=f"Last event: {stamp} {last['text']}")
 
     root.after(1200, update_bot_username)
 
 
 def update_uptime() -> None:
     """Update the bot's uptime."""
-    if "bot_start_time" in globals():
-        elapsed_time = datetime.now() - bot_start_time
+    status = bot_status()
+    if status.get("started_at"):
+        elapsed_time = datetime.now() - datetime.fromtimestamp(status["started_at"])
         hours, remainder = divmod(elapsed_time.seconds, 3600)
         minutes, seconds = divmod(remainder, 60)
         uptime = f"{elapsed_time.days}d {hours}h {minutes}m {seconds}s"
         uptime_label.configure(text=f"Uptime: {uptime}")
+    else:
+        uptime_label.configure(text="Uptime: 0d 0h 0m 0s")
 
     root.after(1000, update_uptime)  # Updates every second
 
@@ -221,7 +214,7 @@ ctk.set_default_color_theme("blue")
 
 root = ctk.CTk()
 root.title("PiShock SB Settings")
-root.geometry("400x380")
+root.geometry("400x490")
 root.resizable(True, False)
 
 
@@ -272,6 +265,20 @@ autofill_button = ctk.CTkButton(
 )
 autofill_button.grid(row=9, column=0, padx=10, pady=5, columnspan=2)
 
+stop_button = ctk.CTkButton(root, text="Stop Bot", command=stop_bot)
+stop_button.grid(row=10, column=0, padx=10, pady=5)
+
+restart_button = ctk.CTkButton(root, text="Restart Bot", command=restart_bot)
+restart_button.grid(row=10, column=1, padx=10, pady=5)
+
+process_label = ctk.CTkLabel(root, text="Process: stopped", anchor="w")
+process_label.grid(row=11, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+event_label = ctk.CTkLabel(root, text="Last event: none", anchor="w")
+event_label.grid(row=12, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
 root.after(1000, update_uptime)
+root.after(500, update_bot_username)
+root.after(500, watch_bot)
 autofill_settings()  # Autofill settings on start
 root.mainloop()
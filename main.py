@@ -1,23 +1,28 @@
 import logging
 import os
 import json
+import signal
 import sys
+import time
 from dotenv import load_dotenv
 import asyncio
 from discord.ext.commands import Bot
+from utils.client import client_options, pick_profile
+from utils.logs import setup_logging
+from utils.profiling import StartupProfile
+from utils.status import StatusWriter
 
 
 logger = logging.getLogger("SB")
 logger.setLevel(logging.INFO)
+# stderr is redirected into this logger below, so passing records up to a
+# root handler that writes to stderr would loop forever
+logger.propagate = False
 
 if not logger.hasHandlers():
-    file_handler = logging.FileHandler("bot_log.log")
-    file_handler.setLevel(logging.INFO)
-
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    file_handler.setFormatter(formatter)
-
-    logger.addHandler(file_handler)
+    load_dotenv()
+    # disk writes happen on a listener thread, logging calls only enqueue
+    setup_logging(logger, "bot_log.log")
 
 
 # Redirects stdout and stderr
@@ -34,23 +39,85 @@ sys.stdout = LoggerStream()
 sys.stderr = LoggerStream()
 
 
+def cog_names(directory) -> list:
+    """the cogs in ``directory``, or just the ones named in ``COGS`` (e.g. ``COGS=shock``)"""
+    names = sorted(filename[:-3] for filename in os.listdir(directory) if filename.endswith(".py"))
+    wanted = os.getenv("COGS")
+    if wanted:
+        wanted = {name.strip() for name in wanted.split(",")}
+        names = [name for name in names if name in wanted]
+    return names
+
+
 class Shock(Bot):
     WORDLIST_FILE = "wordlist.json"
     WHITELIST_FILE = "whitelist.json"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.status_writer = StatusWriter()
+        self.profile = StartupProfile(os.getenv("STARTUP_PROFILE") == "1")
+        self._connect_started = None
+        # live state a cog hands over to its reloaded self, see reload_cog
+        self.carryover = {}
+        self.reloading = False
 
     async def load_cogs_from_dir(self, directory):
         """Load all cogs."""
-        for filename in os.listdir(directory):
-            if filename.endswith(".py"):
-                await self.load_extension(f"cogs.{filename[:-3]}")
+        for cog in cog_names(directory):
+            name = f"cogs.{cog}"
+            with self.profile.timer(f"load {name}", track_imports=True):
+                await self.load_extension(name)
         logger.info(f"{len(self.cogs)} Cogs have been loaded")
 
+    async def reload_cog(self, cog: str) -> float:
+        """(re)loads ``cogs.<cog>`` in place, returns how long it took
+
+        The gateway session stays up. While reloading, ``cog_unload`` can put
+        state in ``carryover`` for the new ``cog_load`` instead of closing it.
+        If the new version fails to load, the previous one is set up again
+        (with the same carryover) and the error is raised.
+        """
+        name = f"cogs.{cog}"
+        start = time.perf_counter()
+        self.reloading = True
+        try:
+            if name in self.extensions:
+                await self.reload_extension(name)
+            else:
+                await self.load_extension(name)
+        finally:
+            self.reloading = False
+            self.carryover.clear()
+        return time.perf_counter() - start
+
+    async def setup_hook(self):
+        """Runs once before connecting, so the cogs are ready for the first event."""
+        self.profile.since_process_start("process start to setup")
+        await self.load_cogs_from_dir("cogs")
+        self._connect_started = time.perf_counter()
+
     async def on_ready(self):
         logger.info(f"Logged on as {self.user}")
-        await self.load_cogs_from_dir("cogs")
+        self.status_writer.publish(state="ready", user=str(self.user), connected=True)
+        self.status_writer.event("Connected")
+        if self._connect_started is not None:
+            self.profile.mark("gateway connect", time.perf_counter() - self._connect_started)
+            self._connect_started = None
+        for line in self.profile.report():
+            logger.info(line)
+
+    async def on_disconnect(self):
+        self.status_writer.publish(state="disconnected", connected=False)
+
+    async def on_resumed(self):
+        self.status_writer.publish(state="ready", connected=True)
+        self.status_writer.event("Resumed")
+
+    async def close(self):
+        self.status_writer.publish(state="stopped", connected=False)
+        self.status_writer.flush()
+        await super().close()
 
     def load_json(self, file_path):
         try:
@@ -72,11 +139,39 @@ async def start_bot():
         logger.error("Error: No token found in .env file.")
         return
 
+    profile = pick_profile(cog_names("cogs"))
+    try:
+        options = client_options(profile)
+    except ValueError as e:
+        logger.error(f"Error: {e}")
+        return
+    logger.info(f"Using the {profile} client profile.")
+
     bot = Shock(
-        command_prefix=">", self_bot=True
+        command_prefix=">", self_bot=True, **options
     )  # Technically can work as a normal bot too
+    bot.status_writer.publish(state="connecting")
+
+    # the GUI stops the bot with SIGTERM, closing unloads the cogs so their queued writes are flushed
+    closing = None
+
+    def stop():
+        nonlocal closing
+        if closing is None:
+            logger.info("Stopping.")
+            closing = asyncio.create_task(bot.close())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop)
+        except NotImplementedError:
+            # Windows, where terminate() can't be caught anyway
+            pass
 
     await bot.start(token)
+    if closing is not None:
+        await closing
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+from utils.access import AccessIndex
+
+GUILD, CHANNEL, THREAD, OTHER = 111, 222, 333, 999
+
+
+def test_whitelisted_users_trigger_everywhere_without_places():
+    index = AccessIndex.from_data({"whitelist": [1, 2]})
+    assert 1 in index and 3 not in index
+    assert index.allows(1, OTHER, OTHER, None)
+    assert not index.allows(3, OTHER, OTHER, None)
+
+
+def test_guilds_and_channels_limit_the_whitelist():
+    index = AccessIndex.from_data({"whitelist": [1], "guilds": [GUILD], "channels": [CHANNEL]})
+    assert index.allows(1, GUILD, OTHER, None)
+    assert index.allows(1, None, CHANNEL, None)
+    # a thread under an allowed channel
+    assert index.allows(1, OTHER, THREAD, CHANNEL)
+    assert not index.allows(1, OTHER, OTHER, None)
+
+
+def test_empty_places_block_the_whitelist_everywhere():
+    index = AccessIndex.from_data({"whitelist": [1], "guilds": []})
+    assert not index.allows(1, GUILD, CHANNEL, None)
+
+
+def test_scoped_users_only_trigger_in_their_place():
+    index = AccessIndex.from_data({"whitelist": [1], "scopes": {str(CHANNEL): [5]}})
+    assert 5 in index
+    assert index.allows(5, GUILD, CHANNEL, None)
+    assert index.allows(5, GUILD, THREAD, CHANNEL)
+    assert not index.allows(5, GUILD, OTHER, None)
+    # scopes don't widen anyone else
+    assert not index.allows(6, GUILD, CHANNEL, None)
+
+
+def test_scopes_apply_when_the_whitelist_is_limited_elsewhere():
+    index = AccessIndex.from_data({"whitelist": [1], "guilds": [GUILD], "scopes": {str(OTHER): [1]}})
+    assert index.allows(1, GUILD, CHANNEL, None)
+    assert index.allows(1, None, OTHER, None)
+    assert not index.allows(1, None, CHANNEL, None)
+
+
+def test_invalid_data_allows_no_one():
+    for data in (None, [], "x", {"whitelist": "1"}):
+        index = AccessIndex.from_data(data)
+        assert not index
+        assert not index.allows(1, GUILD, CHANNEL, None)
+
+
+def test_invalid_ids_are_skipped_and_logged(caplog):
+    data = {
+        "whitelist": [1, "abc", None, "2"],
+        "channels": [CHANNEL, "x"],
+        "scopes": {"not a place": [5], str(GUILD): [6, None]},
+    }
+    index = AccessIndex.from_data(data)
+    assert index.anywhere == {1, 2}
+    assert index.places == {CHANNEL}
+    assert index.scoped == {(GUILD, 6)}
+    assert index.allows(1, None, CHANNEL, None)
+    assert len(caplog.records) == 5
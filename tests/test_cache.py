@@ -0,0 +1,65 @@
+from utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1, "evictions": 0, "expired": 1}
+
+
+def test_setting_again_restarts_the_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4
+    cache.set("a", 2)
+    clock.now = 8
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted_when_full():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # reading "a" makes "b" the oldest
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_missing_keys_return_the_default():
+    cache = TTLCache()
+    assert cache.get("a", "default") == "default"
+    assert cache.pop("a", "default") == "default"
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert len(cache) == 0
+
+
+def test_hit_rate():
+    cache = TTLCache()
+    assert cache.hit_rate == 0.0
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.hit_rate == 0.5
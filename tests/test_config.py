@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from utils.config import ConfigStore, EnvFile, WatchedJson
+from utils.files import atomic_write
+
+
+@pytest.fixture(autouse=True)
+def environ(monkeypatch):
+    # EnvFile.set exports to os.environ
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "whitelist.json").write_text(json.dumps({"whitelist": [1]}))
+    (tmp_path / "wordlist.json").write_text(json.dumps({"words": ["zap"], "rules": {}}))
+    store = ConfigStore(
+        str(tmp_path / "whitelist.json"),
+        str(tmp_path / "wordlist.json"),
+        str(tmp_path / ".env"),
+        poll_interval=0,
+        flush_delay=0.05,
+    )
+    yield store
+    store.close()
+
+
+def test_env_flush_keeps_keys_saved_by_another_process(tmp_path):
+    path = str(tmp_path / ".env")
+    atomic_write(path, "DISCORD_TOKEN=old\nSHOCKER_APIKEY=old\n")
+    bot, gui = EnvFile(path), EnvFile(path)
+
+    gui.set(DISCORD_TOKEN="new")
+    gui.flush()
+    bot.set(SHOCKER_APIKEY="key")
+    bot.flush()
+
+    with open(path) as f:
+        assert f.read() == "DISCORD_TOKEN=new\nSHOCKER_APIKEY=key\n"
+    assert not bot.pending
+    assert bot.values == {"DISCORD_TOKEN": "new", "SHOCKER_APIKEY": "key"}
+
+
+def test_env_set_to_the_same_value_writes_nothing(tmp_path):
+    path = str(tmp_path / ".env")
+    atomic_write(path, "SHOCKER_CODE=abc\n")
+    env = EnvFile(path)
+    env.set(SHOCKER_CODE="abc")
+    assert not env.pending
+    assert os.environ["SHOCKER_CODE"] == "abc"
+
+
+def test_env_values_with_spaces_are_quoted(tmp_path):
+    path = str(tmp_path / ".env")
+    env = EnvFile(path)
+    env.set(SHOCKER_USERNAME='a "b"')
+    env.flush()
+    assert EnvFile(path).values == {"SHOCKER_USERNAME": 'a "b"'}
+
+
+def test_atomic_write_from_threads_leaves_one_complete_file(tmp_path):
+    path = str(tmp_path / "file.json")
+
+    def write(n):
+        for _ in range(50):
+            atomic_write(path, json.dumps({"writer": n, "padding": "x" * 1000}))
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path) as f:
+        assert json.load(f)["writer"] in range(4)
+    assert os.listdir(tmp_path) == ["file.json"]
+
+
+def test_watched_json_keeps_the_last_good_copy(tmp_path):
+    path = tmp_path / "wordlist.json"
+    path.write_text(json.dumps({"words": ["a"]}))
+    watched = WatchedJson(str(path), lambda data: data, poll_interval=0)
+    assert watched.get() == {"words": ["a"]}
+
+    path.write_text('{"words": [')
+    assert watched.get() == {"words": ["a"]}
+
+    path.write_text(json.dumps({"words": ["a", "b"]}))
+    assert watched.get() == {"words": ["a", "b"]}
+
+
+def test_store_applies_changes_in_memory_before_writing(store, tmp_path):
+    assert store.add_word("buzz")
+    assert not store.add_word("buzz")
+    assert store.words == ("zap", "buzz")
+    with open(tmp_path / "wordlist.json") as f:
+        assert json.load(f)["words"] == ["zap"]
+
+    store.flush()
+    with open(tmp_path / "wordlist.json") as f:
+        # the rules next to the words are kept
+        assert json.load(f) == {"words": ["zap", "buzz"], "rules": {}}
+
+
+def test_store_writes_a_burst_of_changes_once_inside_a_loop(store, tmp_path):
+    writes = []
+    original = store._wordlist.flush
+
+    def counting_flush():
+        if store._wordlist.pending:
+            writes.append(store.words)
+        original()
+
+    store._wordlist.flush = counting_flush
+
+    async def main():
+        for word in ("a", "b", "c"):
+            store.add_word(word)
+        await asyncio.sleep(0.3)
+
+    asyncio.run(main())
+    assert writes == [("zap", "a", "b", "c")]
+    with open(tmp_path / "wordlist.json") as f:
+        assert json.load(f)["words"] == ["zap", "a", "b", "c"]
+
+
+def test_store_close_writes_pending_changes(store, tmp_path):
+    async def main():
+        store.set_whitelist([1, 2])
+        store.set_env(SHOCKER_CODE="abc")
+        store.close()
+
+    asyncio.run(main())
+    with open(tmp_path / "whitelist.json") as f:
+        assert json.load(f)["whitelist"] == [1, 2]
+    with open(tmp_path / ".env") as f:
+        assert f.read() == "SHOCKER_CODE=abc\n"
+
+
+def test_store_sees_changes_made_by_another_process(store, tmp_path):
+    assert 5 not in store.whitelist
+    (tmp_path / "whitelist.json").write_text(json.dumps({"whitelist": [1, 5]}))
+    store.invalidate()
+    assert 5 in store.whitelist
+    assert store.whitelist_ids == [1, 5]
+
+
+def test_store_skips_invalid_whitelist_ids_once_per_reload(store, tmp_path, caplog):
+    (tmp_path / "whitelist.json").write_text(json.dumps({"whitelist": [1, "abc", None]}))
+    store.invalidate()
+    for _ in range(3):
+        assert 1 in store.whitelist
+        assert store.whitelist_ids == [1]
+    assert len(caplog.records) == 2
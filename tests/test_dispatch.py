@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from utils.dispatch import DispatchQueue, ShockCommand, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("utils.dispatch.time.monotonic", clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_waits_for_the_rate(clock):
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    for _ in range(2):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert bucket.delay() == pytest.approx(2.0)
+
+    clock.now += 1
+    assert bucket.delay() == pytest.approx(1.0)
+    clock.now += 1
+    assert bucket.delay() == 0
+
+
+def test_bucket_refills_up_to_its_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.take()
+    clock.now += 60
+    bucket.take()
+    bucket.take()
+    assert bucket.delay() == pytest.approx(1.0)
+
+
+def test_bucket_without_a_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    for _ in range(5):
+        bucket.take()
+    assert bucket.delay() == 0
+
+
+def test_bucket_rejects_a_negative_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=-1, capacity=1)
+
+
+class FakeDevice:
+    def __init__(self):
+        self.calls = []
+        self.release = None
+
+    async def send(self, mode, duration, intensity):
+        self.calls.append(ShockCommand(mode, duration, intensity))
+        if self.release is not None:
+            await self.release.wait()
+
+
+def queue(device, **kwargs) -> DispatchQueue:
+    kwargs = {"window": 0.01, "rate": 0, **kwargs}
+    return DispatchQueue(device.send, **kwargs)
+
+
+async def burst(q, *commands):
+    return await asyncio.gather(*(q.submit(*command) for command in commands))
+
+
+def test_burst_is_merged_into_the_strongest_command():
+    device = FakeDevice()
+    q = queue(device)
+
+    results = asyncio.run(burst(q, ("shock", 1, 20), ("shock", 3, 50), ("shock", 2, 50)))
+    assert device.calls == [ShockCommand("shock", 3, 50)]
+    assert [r.status for r in results] == ["merged", "sent", "merged"]
+    assert {r.batch_size for r in results} == {3}
+    assert q.stats() == {"depth": 0, "sent": 1, "merged": 2, "dropped": 0, "failed": 0}
+
+
+def test_max_only_merges_commands_of_the_same_mode():
+    device = FakeDevice()
+    q = queue(device)
+
+    results = asyncio.run(burst(q, ("shock", 1, 20), ("vibrate", 1, 90), ("shock", 1, 30)))
+    assert device.calls == [ShockCommand("shock", 1, 30), ShockCommand("vibrate", 1, 90)]
+    assert [r.status for r in results] == ["merged", "sent", "sent"]
+
+
+def test_latest_sends_the_most_recent_command():
+    device = FakeDevice()
+    q = queue(device, policy="latest")
+
+    asyncio.run(burst(q, ("shock", 1, 90), ("vibrate", 1, 10)))
+    assert device.calls == [ShockCommand("vibrate", 1, 10)]
+
+
+def test_rate_limited_commands_wait_and_merge():
+    device = FakeDevice()
+    q = queue(device, window=0, rate=10, burst=1)
+
+    async def main():
+        first = asyncio.create_task(q.submit("shock", 1, 10))
+        await asyncio.sleep(0.01)
+        # the bucket is empty until 0.1s after the first call, these arrive meanwhile
+        later = asyncio.create_task(burst(q, ("shock", 1, 20), ("shock", 1, 40)))
+        return await first, await later
+
+    first, later = asyncio.run(main())
+    assert device.calls == [ShockCommand("shock", 1, 10), ShockCommand("shock", 1, 40)]
+    assert first.status == "sent"
+    assert [r.status for r in later] == ["merged", "sent"]
+
+
+def test_requests_past_max_pending_are_dropped():
+    device = FakeDevice()
+    q = queue(device, max_pending=2)
+
+    results = asyncio.run(burst(q, ("shock", 1, 10), ("shock", 1, 20), ("shock", 1, 30)))
+    assert [r.status for r in results] == ["merged", "sent", "dropped"]
+    assert q.dropped == 1
+
+
+def test_failed_call_fails_every_request_in_the_batch():
+    async def send(*command):
+        raise RuntimeError("api down")
+
+    q = DispatchQueue(send, window=0.01, rate=0)
+
+    async def main():
+        return await asyncio.gather(
+            q.submit("shock", 1, 10), q.submit("shock", 1, 20), return_exceptions=True
+        )
+
+    assert [type(r) for r in asyncio.run(main())] == [RuntimeError, RuntimeError]
+    assert q.failed == 1
+
+
+def test_close_cancels_the_batch_being_sent():
+    device = FakeDevice()
+    q = queue(device)
+
+    async def main():
+        device.release = asyncio.Event()
+        waiting = asyncio.gather(q.submit("shock", 1, 10), return_exceptions=True)
+        while not device.calls:
+            await asyncio.sleep(0.001)
+        q.close()
+        return await asyncio.wait_for(waiting, 1)
+
+    [result] = asyncio.run(main())
+    assert isinstance(result, asyncio.CancelledError)
@@ -0,0 +1,88 @@
+import json
+import re
+
+import pytest
+
+from utils.export import ChatExport, author_id, places
+
+MESSAGES = [
+    {"id": str(i), "content": content, "author": {"id": "7", "name": "someone"}}
+    for i, content in enumerate(["hello", "zap me", "nothing", "ZAP 50 3", "zapping"])
+]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # every message and the "messages" key end up split between reads
+    monkeypatch.setattr("utils.export.CHUNK_SIZE", 7)
+
+
+def write(tmp_path, text: str) -> str:
+    path = tmp_path / "export.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def contents(export) -> list:
+    return [message["content"] for message in export]
+
+
+def test_json_lines(tmp_path):
+    path = write(tmp_path, "".join(json.dumps(m) + "\n" for m in MESSAGES))
+    export = ChatExport(path)
+    assert contents(export) == [m["content"] for m in MESSAGES]
+    assert export.read == 5
+
+
+def test_json_lines_only_parse_candidate_lines(tmp_path):
+    path = write(tmp_path, "\n" + "\n".join(json.dumps(m) for m in MESSAGES))
+    export = ChatExport(path, candidates=["zap"], required=[re.compile(r"\bzap\b")])
+    assert contents(export) == ["zap me", "ZAP 50 3"]
+    # the skipped lines still count
+    assert export.read == 5
+
+
+def test_json_lines_with_non_ascii_content(tmp_path):
+    messages = [{"content": "ｚａｐ ZAP"}, {"content": "ünïcode"}]
+    path = write(tmp_path, "\n".join(json.dumps(m, ensure_ascii=False) for m in messages))
+    export = ChatExport(path, candidates=["zap"])
+    assert contents(export) == ["ｚａｐ ZAP"]
+
+
+def test_array_split_across_chunks(tmp_path, small_chunks):
+    path = write(tmp_path, json.dumps(MESSAGES, indent=2))
+    export = ChatExport(path)
+    assert contents(export) == [m["content"] for m in MESSAGES]
+    assert export.read == 5
+
+
+def test_empty_array(tmp_path, small_chunks):
+    assert contents(ChatExport(write(tmp_path, "[ ]"))) == []
+
+
+@pytest.mark.parametrize("indent", [4, None], ids=["pretty", "compact"])
+def test_object_with_a_messages_array(tmp_path, indent):
+    data = {"guild": {"id": "1", "name": "messages"}, "messages": MESSAGES, "messageCount": 5}
+    export = ChatExport(write(tmp_path, json.dumps(data, indent=indent)), candidates=["zap"])
+    # arrays are parsed in full, so every message is yielded
+    assert contents(export) == [m["content"] for m in MESSAGES]
+    assert export.read == 5
+
+
+@pytest.mark.parametrize("indent", [4, None], ids=["pretty", "compact"])
+def test_object_split_across_chunks(tmp_path, small_chunks, indent):
+    data = {"guild": {"id": "1"}, "messages": MESSAGES}
+    export = ChatExport(write(tmp_path, json.dumps(data, indent=indent)))
+    assert contents(export) == [m["content"] for m in MESSAGES]
+
+
+def test_object_without_messages_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        list(ChatExport(write(tmp_path, json.dumps({"guild": {"id": "1"}}, indent=2))))
+
+
+def test_author_id_and_places():
+    assert author_id({"author": {"id": "7"}}) == 7
+    assert author_id({"user_id": 8}) == 8
+    assert author_id({"author": {"id": None}}) is None
+    assert places({"guild_id": "1", "channel_id": "x"}) == [1]
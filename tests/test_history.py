@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.batching import BatchWorker
+from utils.history import ShockEvent, ShockHistory, parse_age, parse_filters
+
+
+def test_batch_worker_writes_everything_queued_before_stop():
+    batches = []
+    release = threading.Event()
+
+    def write(batch):
+        release.wait()
+        batches.append(batch)
+
+    worker = BatchWorker("test", write, batch_size=4)
+    worker.start()
+    for item in range(10):
+        worker.put(item)
+    release.set()
+    worker.stop()
+
+    assert [item for batch in batches for item in batch] == list(range(10))
+    assert all(len(batch) <= 4 for batch in batches)
+
+
+def event(ts, user_id=1, word="zap"):
+    return ShockEvent(ts, user_id, word, "shock", 10, 1, "abc", "sent")
+
+
+def test_history_queries_newest_first_with_filters(tmp_path):
+    history = ShockHistory(str(tmp_path / "history.db"))
+    now = time.time()
+    for age, user_id, word in [(30, 1, "zap"), (20, 2, "zap"), (10, 1, "buzz")]:
+        history.record(event(now - age, user_id, word))
+    history._writer.stop()
+
+    async def main():
+        return (
+            await history.query(),
+            await history.query(user_id=1),
+            await history.query(word="ZAP", since=now - 25),
+            await history.query(limit=1),
+        )
+
+    latest, user, word, limited = asyncio.run(main())
+    history.close()
+    assert [e.ts for e in latest] == [now - 10, now - 20, now - 30]
+    assert [e.word for e in user] == ["buzz", "zap"]
+    assert [e.user_id for e in word] == [2]
+    assert len(limited) == 1
+    assert history.written == 3
+
+
+def test_parse_filters():
+    assert parse_age("1h30m") == 5400
+    filters = parse_filters(["user=<@123>", "word=zap", "limit=5"])
+    assert filters == {"user_id": 123, "word": "zap", "limit": 5}
+    with pytest.raises(ValueError):
+        parse_filters(["since=yesterday"])
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a cog with a write still waiting in its write-behind store when the bot stops
+PROBE_COG = """
+from discord.ext import commands
+
+from utils.config import ConfigStore
+
+
+class Probe(commands.Cog):
+    def __init__(self):
+        self.config = ConfigStore(flush_delay=60)
+
+    async def cog_load(self):
+        self.config.add_word("zap")
+
+    async def cog_unload(self):
+        self.config.close()
+
+
+async def setup(bot):
+    await bot.add_cog(Probe())
+"""
+
+# runs the bot without Discord, it gets SIGTERM as soon as it would connect
+RUN_BOT = """
+import asyncio
+import os
+import signal
+
+import discord
+from discord.http import HTTPClient
+
+
+async def static_login(self, token):
+    return {"id": "1", "username": "test", "discriminator": "0001", "avatar": None}
+
+
+async def connect(self, *, reconnect=True):
+    os.kill(os.getpid(), signal.SIGTERM)
+    while not self.is_closed():
+        await asyncio.sleep(0.01)
+
+
+HTTPClient.static_login = static_login
+discord.Client.connect = connect
+
+import main
+
+asyncio.run(main.start_bot())
+"""
+
+
+@pytest.fixture
+def bot_dir(tmp_path):
+    (tmp_path / "cogs").mkdir()
+    (tmp_path / "cogs" / "probe.py").write_text(PROBE_COG)
+    (tmp_path / "run_bot.py").write_text(RUN_BOT)
+    (tmp_path / "wordlist.json").write_text(json.dumps({"words": []}))
+    (tmp_path / "whitelist.json").write_text(json.dumps({"whitelist": []}))
+    return tmp_path
+
+
+def run_bot(bot_dir) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": ROOT, "DISCORD_TOKEN": "token", "COGS": "probe"}
+    return subprocess.run([sys.executable, "run_bot.py"], cwd=bot_dir, env=env, timeout=30)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGTERM can't be handled on Windows")
+def test_sigterm_unloads_the_cogs_so_pending_writes_are_flushed(bot_dir):
+    assert run_bot(bot_dir).returncode == 0
+    assert json.loads((bot_dir / "wordlist.json").read_text())["words"] == ["zap"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGTERM can't be handled on Windows")
+def test_sigterm_leaves_the_status_file_stopped(bot_dir):
+    run_bot(bot_dir)
+    status = json.loads((bot_dir / "bot_status.json").read_text())
+    assert status["state"] == "stopped"
+    assert not status["connected"]
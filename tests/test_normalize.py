@@ -0,0 +1,47 @@
+import pytest
+
+from utils.normalize import normalize, source_offset
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "shock",
+        "SHOCK",
+        "sh0ck",
+        "ｓｈｏｃｋ",  # full width
+        "ѕһос\u200bк",  # Cyrillic look-alikes and a zero-width space
+        "s̶h̶o̶c̶k̶",  # strike-through combining marks
+        "𝐬𝐡𝐨𝐜𝐤",  # mathematical bold
+        "ⓢⓗⓞⓒⓚ",  # enclosed letters
+        "śhöçk",
+    ],
+)
+def test_disguised_spellings_normalize_to_the_word(text):
+    # the matcher ignores case, so plain capitals are left as they are
+    assert normalize(text).lower() == "shock"
+
+
+def test_leetspeak_is_applied_to_words_and_messages_alike():
+    assert normalize("zap") == normalize("z4p") == "zap"
+    assert normalize("1337") == "ieet"
+
+
+def test_unrelated_text_is_left_alone():
+    assert normalize("hello, world!") == "heiio, worid!"
+    assert normalize("日本語 👍") == "日本語 👍"
+
+
+def test_source_offset_skips_removed_characters():
+    text = "a s\u200bh0ck"
+    offset = normalize(text).index("shock")
+    assert text[source_offset(text, offset)] == "s"
+    end = source_offset(text, offset + len("shock"))
+    assert text[source_offset(text, offset):end] == "s\u200bh0ck"
+
+
+def test_source_offset_handles_characters_that_expand():
+    # the ligature folds to two letters
+    text = "ﬁre shock"
+    offset = normalize(text).index("shock")
+    assert text[source_offset(text, offset):] == "shock"
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from utils.patterns import MAX_PATTERN_SECONDS, MAX_STEPS, PatternScheduler, Step, parse_patterns
+
+
+def test_parse_patterns_clamps_steps_to_the_usual_limits():
+    patterns = parse_patterns({
+        "Ramp": [
+            {"mode": "vibrate", "intensity": 500, "duration": 0, "gap": 99},
+            {"mode": "nope", "intensity": "x"},
+            "not a step",
+        ],
+        "empty": [],
+        "junk": "not a list",
+    })
+    assert patterns == {"ramp": (Step("vibrate", 100, 1, 10.0), Step("shock", 10, 1, 0.0))}
+
+
+def test_parse_patterns_drops_steps_past_the_limits():
+    many = parse_patterns({"p": [{"duration": 1}] * (MAX_STEPS + 5)})["p"]
+    assert len(many) == MAX_STEPS
+    long = parse_patterns({"p": [{"duration": 15, "gap": 10}] * 5})["p"]
+    assert sum(s.duration + s.gap for s in long) <= MAX_PATTERN_SECONDS
+    assert len(long) == 2
+
+
+def steps(count, duration=0.02):
+    return tuple(Step("vibrate", 10, duration) for _ in range(count))
+
+
+class Recorder:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = []
+
+    async def send(self, step, *context):
+        self.sent.append((time.monotonic(), context))
+        await asyncio.sleep(self.latency)
+
+
+def test_steps_are_due_from_the_start_not_from_the_previous_send():
+    # a slow API must not push the later steps back
+    recorder = Recorder(latency=0.05)
+
+    async def main():
+        scheduler = PatternScheduler(recorder.send)
+        start = time.monotonic()
+        scheduler.start("p", steps(5), "ctx")
+        await scheduler._task
+        return start, scheduler
+
+    start, scheduler = asyncio.run(main())
+    offsets = [at - start for at, _ in recorder.sent]
+    for index, offset in enumerate(offsets):
+        assert abs(offset - index * 0.02) < 0.015
+    assert all(context == ("ctx",) for _, context in recorder.sent)
+    assert len(scheduler.last_errors) == 5
+
+
+def test_step_error_is_recorded_when_the_send_starts():
+    clock_now = [0.0]
+    recorded = []
+
+    async def send(step):
+        recorded.append(clock_now[0])
+
+    async def main():
+        scheduler = PatternScheduler(send, clock=lambda: clock_now[0])
+        scheduler.start("p", (Step("vibrate", 10, 0),))
+        # the scheduler wakes up on time, but its send task only starts later
+        await asyncio.sleep(0)
+        clock_now[0] = 0.25
+        await scheduler._task
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.last_errors == [0.25]
+
+
+def test_patterns_play_one_after_another_up_to_max_queued():
+    recorder = Recorder()
+
+    async def main():
+        scheduler = PatternScheduler(recorder.send, max_queued=2)
+        assert scheduler.start("a", steps(2), "a")
+        assert scheduler.start("b", steps(2), "b")
+        assert not scheduler.start("c", steps(2), "c")
+        await scheduler._task
+
+    asyncio.run(main())
+    assert [context for _, context in recorder.sent] == [("a",), ("a",), ("b",), ("b",)]
+
+
+def test_stop_cancels_the_running_and_queued_patterns():
+    recorder = Recorder(latency=1)
+
+    async def main():
+        scheduler = PatternScheduler(recorder.send)
+        scheduler.start("a", steps(10, 0.05))
+        scheduler.start("b", steps(10, 0.05))
+        await asyncio.sleep(0.07)
+        assert scheduler.stop() == 2
+        sent = len(recorder.sent)
+        await asyncio.sleep(0.2)
+        assert len(recorder.sent) == sent
+        assert not scheduler._sends
+        assert scheduler.current is None
+
+    asyncio.run(main())
+    assert len(recorder.sent) == 2
+
+
+def test_a_failing_step_doesnt_stop_the_pattern():
+    calls = []
+
+    async def send(step):
+        calls.append(step)
+        raise RuntimeError("device offline")
+
+    async def main():
+        scheduler = PatternScheduler(send)
+        scheduler.start("p", steps(3, 0))
+        await scheduler._task
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert len(calls) == 3
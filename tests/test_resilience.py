@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+import requests
+from pishock.zap.httpapi import DeviceInUseError, NotAuthorizedError
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+
+class FakeAPI:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def send(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == "hang":
+            await asyncio.sleep(60)
+        return outcome
+
+
+def policy(**kwargs) -> ResiliencePolicy:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=kwargs.pop("reset_timeout", 0))
+    return ResiliencePolicy(timeout=kwargs.pop("timeout", 1), retries=0, backoff=0, breaker=breaker, **kwargs)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_breaker_opens_after_unhealthy_calls_in_a_row():
+    p = policy(reset_timeout=60)
+    api = FakeAPI(requests.ConnectionError(), requests.ConnectionError())
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                await p.call(api.send)
+        with pytest.raises(CircuitOpenError):
+            await p.call(api.send)
+
+    run(main())
+    assert p.breaker.state == CircuitBreaker.OPEN
+    assert api.calls == 2
+    assert p.breaker.rejected == 1
+
+
+def test_answers_from_the_api_keep_the_breaker_closed():
+    p = policy()
+    api = FakeAPI(NotAuthorizedError(), NotAuthorizedError(), NotAuthorizedError())
+
+    async def main():
+        for _ in range(3):
+            with pytest.raises(NotAuthorizedError):
+                await p.call(api.send)
+
+    run(main())
+    assert p.breaker.state == CircuitBreaker.CLOSED
+
+
+def open_breaker(p: ResiliencePolicy) -> None:
+    for _ in range(p.breaker.failure_threshold):
+        p.breaker.before_call()
+        p.breaker.record_failure(requests.ConnectionError())
+    assert p.breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_trial_success_closes_the_breaker():
+    p = policy()
+    open_breaker(p)
+    assert run(p.call(FakeAPI("ok").send)) == "ok"
+    assert p.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_failure_opens_the_breaker_again():
+    p = policy(reset_timeout=60)
+    open_breaker(p)
+    p.breaker.opened_at -= 60
+
+    with pytest.raises(requests.ConnectionError):
+        run(p.call(FakeAPI(requests.ConnectionError()).send))
+    assert p.breaker.state == CircuitBreaker.OPEN
+
+
+def test_only_one_trial_runs_while_half_open():
+    p = policy()
+    open_breaker(p)
+    api = FakeAPI("hang")
+
+    async def main():
+        trial = asyncio.create_task(p.call(api.send))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await p.call(api.send)
+        trial.cancel()
+
+    run(main())
+    assert api.calls == 1
+
+
+def test_cancelled_trial_lets_the_next_call_through():
+    p = policy()
+    open_breaker(p)
+    api = FakeAPI("hang", "ok")
+
+    async def main():
+        trial = asyncio.create_task(p.call(api.send))
+        await asyncio.sleep(0)
+        assert p.breaker.state == CircuitBreaker.HALF_OPEN
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return await p.call(api.send)
+
+    assert run(main()) == "ok"
+    assert p.breaker.state == CircuitBreaker.CLOSED
+    assert p.in_flight == 0
+
+
+def test_timeouts_count_as_unhealthy():
+    p = policy(timeout=0.01)
+    api = FakeAPI("hang", "hang")
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await p.call(api.send)
+
+    run(main())
+    assert p.timeouts == 2
+    assert p.breaker.state == CircuitBreaker.OPEN
+
+
+def test_only_failures_that_cant_have_reached_the_device_are_retried():
+    p = policy()
+    p.retries = 2
+    busy = FakeAPI(DeviceInUseError(), DeviceInUseError(), "ok")
+    assert run(p.call(busy.send)) == "ok"
+    assert busy.calls == 3
+
+    # a read timeout may have been delivered, so it's never retried
+    dropped = FakeAPI(requests.ReadTimeout(), "ok")
+    with pytest.raises(requests.ReadTimeout):
+        run(p.call(dropped.send))
+    assert dropped.calls == 1
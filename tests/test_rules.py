@@ -0,0 +1,90 @@
+import pytest
+
+from utils.matcher import TriggerMatch, TriggerMatcher
+from utils.rules import TriggerAction, TriggerRules
+
+
+def test_matcher_respects_word_boundaries():
+    matcher = TriggerMatcher(["no", "shock"])
+    assert matcher.search("I know") is None
+    assert matcher.search("shocking") is None
+    assert matcher.search("oh no!") == TriggerMatch("no", 3, 5)
+
+
+def test_matcher_is_case_insensitive_and_returns_the_listed_spelling():
+    matcher = TriggerMatcher(["Shock"])
+    assert matcher.search("SHOCK me") == TriggerMatch("Shock", 0, 5)
+
+
+def test_matcher_prefers_the_longest_word_sharing_a_prefix():
+    matcher = TriggerMatcher(["sh", "shock", "shocker"])
+    assert [m.word for m in matcher.find_all("sh shock shocker")] == ["sh", "shock", "shocker"]
+
+
+def test_empty_matcher_matches_nothing():
+    matcher = TriggerMatcher(["", ""])
+    assert not matcher
+    assert matcher.search("anything") is None
+    assert matcher.find_all("anything") == []
+
+
+def test_words_with_regex_characters_are_literal():
+    matcher = TriggerMatcher(["a.b", "c+"])
+    assert matcher.search("axb") is None
+    assert matcher.search("a.b") == TriggerMatch("a.b", 0, 3)
+
+
+def test_find_all_starts_with_the_same_match_as_match():
+    rules = TriggerRules({"words": ["zap", "buzz"], "rules": {"zap": {"normalize": True}}})
+    for content in ("buzz then zap", "z4p then buzz", "ｚａｐ", "nothing here"):
+        found = rules.find_all(content)
+        assert (found[0] if found else None) == rules.match(content)
+
+
+def test_find_all_lists_plain_matches_before_normalized_ones():
+    rules = TriggerRules({"words": ["zap", "buzz"], "rules": {"zap": {"normalize": True}}})
+    assert [m.word for m in rules.find_all("z4p and buzz")] == ["buzz", "zap"]
+
+
+def test_normalized_match_points_into_the_original_text():
+    rules = TriggerRules({"words": ["shock"], "rules": {"shock": {"normalize": True}}})
+    content = "ok s\u200bh0ck 20"
+    match = rules.match(content)
+    assert match.word == "shock"
+    assert content[match.offset:match.end] == "s\u200bh0ck"
+    assert rules.action(match, content, 1).intensity == 20
+
+
+def test_action_uses_the_word_rule_then_values_after_the_trigger():
+    rules = TriggerRules({
+        "words": ["zap", "buzz"],
+        "default": {"intensity": 15, "duration": 2},
+        "rules": {"buzz": {"mode": "vibrate", "intensity": 40}},
+    })
+    assert rules.action(rules.match("zap"), "zap", 1) == TriggerAction("zap", "shock", 15, 2)
+    assert rules.action(rules.match("buzz"), "buzz", 1) == TriggerAction("buzz", "vibrate", 40, 2)
+    assert rules.action(rules.match("zap 30 4"), "zap 30 4", 1) == TriggerAction("zap", "shock", 30, 4)
+
+
+@pytest.mark.parametrize("content", ["zap 0", "zap 101", "zap 10 0", "zap 10 16"])
+def test_action_rejects_values_out_of_range(content):
+    rules = TriggerRules({"words": ["zap"]})
+    with pytest.raises(ValueError):
+        rules.action(rules.match(content), content, 1)
+
+
+def test_rules_from_the_file_are_clamped():
+    rules = TriggerRules({"words": ["zap"], "rules": {"zap": {"intensity": 500, "duration": -3, "mode": "x"}}})
+    assert rules.rules["zap"][:3] == ("shock", 100, 1)
+
+
+def test_caps_limit_each_user():
+    rules = TriggerRules({"words": ["zap"]}, {"caps": {"7": {"intensity": 20, "duration": 3}}})
+    assert rules.action(rules.match("zap 80 10"), "zap 80 10", 7)[2:4] == (20, 3)
+    assert rules.action(rules.match("zap 80 10"), "zap 80 10", 8)[2:4] == (80, 10)
+
+
+def test_caps_with_invalid_user_ids_are_skipped(caplog):
+    rules = TriggerRules({"words": ["zap"]}, {"caps": {"abc": {"intensity": 20}, "7": {"intensity": 30}}})
+    assert rules.caps == {7: (30, 15)}
+    assert "'abc'" in caplog.text
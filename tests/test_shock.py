@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cache import TTLCache
+from utils.status import StatusWriter
+
+
+@pytest.fixture(scope="module")
+def shock_module(tmp_path_factory):
+    cwd = os.getcwd()
+    stdout, stderr = sys.stdout, sys.stderr
+    # main.py sends stdout to bot_log.log in the working directory on import
+    os.chdir(tmp_path_factory.mktemp("bot"))
+    try:
+        import cogs.shock
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        os.chdir(cwd)
+    return cogs.shock
+
+
+class FakeBot:
+    def __init__(self, channel):
+        self.status_writer = StatusWriter(interval=0)
+        self.carryover = {}
+        self.reloading = False
+        self.channel = channel
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+class FakeMessage:
+    guild = SimpleNamespace(id=1)
+
+    def __init__(self, message_id, content, author_id=7, channel=None):
+        self.id = message_id
+        self.content = content
+        self.author = SimpleNamespace(id=author_id)
+        self.channel = channel or SimpleNamespace(id=2)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cog(shock_module, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "wordlist.json").write_text(json.dumps({"words": ["zap", "buzz"]}))
+    (tmp_path / "whitelist.json").write_text(json.dumps({"whitelist": [7]}))
+    channel = SimpleNamespace(id=2)
+    cog = shock_module.Shocker(FakeBot(channel))
+    cog.processed = TTLCache(max_size=16, ttl=60, clock=FakeClock())
+    cog.shocked = []
+
+    async def shock_message(message, match):
+        cog.shocked.append((message.id, match.word))
+
+    cog.shock_message = shock_message
+    # the edited message the library would build from the raw event
+    cog._edited_message = lambda payload: FakeMessage(
+        payload.message_id, payload.data["content"], channel=channel
+    )
+    yield cog
+    cog.config.close()
+
+
+def edit(message_id, content):
+    return SimpleNamespace(message_id=message_id, channel_id=2, data={"content": content})
+
+
+def test_replayed_message_only_shocks_once(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "zap me"))
+        await cog.on_message(FakeMessage(1, "zap me"))
+
+    asyncio.run(main())
+    assert cog.shocked == [(1, "zap")]
+
+
+def test_messages_from_outside_the_whitelist_are_not_remembered(cog):
+    asyncio.run(cog.on_message(FakeMessage(1, "zap me", author_id=8)))
+    assert cog.shocked == []
+    assert len(cog.processed) == 0
+
+
+def test_edit_that_keeps_the_content_is_ignored(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "zap me"))
+        # embeds resolving send an edit with the same content
+        await cog.on_raw_message_edit(edit(1, "zap me"))
+
+    asyncio.run(main())
+    assert cog.shocked == [(1, "zap")]
+
+
+def test_edit_that_keeps_the_triggers_is_ignored(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "zap me"))
+        await cog.on_raw_message_edit(edit(1, "zap me please"))
+        await cog.on_raw_message_edit(edit(1, "ZAP me please"))
+
+    asyncio.run(main())
+    assert cog.shocked == [(1, "zap")]
+
+
+def test_edit_that_adds_a_trigger_shocks_for_the_new_one(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "hello"))
+        await cog.on_raw_message_edit(edit(1, "hello zap"))
+        await cog.on_raw_message_edit(edit(1, "hello zap buzz"))
+
+    asyncio.run(main())
+    assert cog.shocked == [(1, "zap"), (1, "buzz")]
+
+
+def test_edits_without_content_are_ignored(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "hello"))
+        await cog.on_raw_message_edit(SimpleNamespace(message_id=1, channel_id=2, data={}))
+
+    asyncio.run(main())
+    assert cog.shocked == []
+
+
+def test_edits_to_forgotten_messages_are_ignored(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "hello"))
+        cog.processed.clock.now += 60
+        await cog.on_raw_message_edit(edit(1, "hello zap"))
+        # never seen at all
+        await cog.on_raw_message_edit(edit(2, "zap"))
+
+    asyncio.run(main())
+    assert cog.shocked == []
+
+
+def test_new_message_with_a_remembered_content_still_shocks(cog):
+    async def main():
+        await cog.on_message(FakeMessage(1, "zap"))
+        await cog.on_message(FakeMessage(2, "zap"))
+
+    asyncio.run(main())
+    assert cog.shocked == [(1, "zap"), (2, "zap")]
+
+
+def test_an_invalid_whitelist_entry_doesnt_block_everyone(cog, tmp_path):
+    (tmp_path / "whitelist.json").write_text(
+        json.dumps({"whitelist": [7, "abc"], "scopes": {"x": [8]}, "caps": {"y": {}}})
+    )
+    cog.config.invalidate()
+    asyncio.run(cog.on_message(FakeMessage(1, "zap me")))
+    assert cog.shocked == [(1, "zap")]
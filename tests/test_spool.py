@@ -0,0 +1,187 @@
+import asyncio
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from utils.daemon import DaemonClient, DispatchDaemon
+from utils.dispatch import Device, ShockerPool
+from utils.spool import CommandSpool
+
+DEVICES = [Device("abc")]
+
+
+def test_recover_replays_only_unclaimed_fresh_commands(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = CommandSpool(path, freshness=30)
+    queued = spool.add("send", "shock", 1, 10)
+    claimed = spool.add("send", "shock", 2, 20)
+    spool.claim(claimed.id)
+    done = spool.add("direct", "beep", 1, 1)
+    spool.done(done.id)
+    spool.close()
+
+    spool = CommandSpool(path, freshness=30)
+    assert spool.recover() == [queued]
+    # claimed rows are gone for good, the replayed one is sent again from here
+    assert len(spool) == 1
+    spool.close()
+
+
+def test_recover_drops_stale_commands(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = CommandSpool(path, freshness=0.01)
+    spool.add("send", "shock", 1, 10)
+    time.sleep(0.05)
+    assert spool.recover() == []
+    assert len(spool) == 0
+    spool.close()
+
+
+class FakeShocker:
+    def __init__(self, api):
+        self.api = api
+
+    def _call(self, mode, duration, intensity=None):
+        self.api.started.set()
+        self.api.release.wait(5)
+        self.api.calls.append((mode, duration, intensity))
+
+    def shock(self, duration, intensity):
+        self._call("shock", duration, intensity)
+
+    def vibrate(self, duration, intensity):
+        self._call("vibrate", duration, intensity)
+
+    def beep(self, duration):
+        self._call("beep", duration)
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def shocker(self, code):
+        return FakeShocker(self)
+
+    def close(self):
+        self.release.set()
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "dispatch.sock"), str(tmp_path / "spool.db")
+
+
+async def start_daemon(paths, api, window):
+    socket_path, spool_path = paths
+    pool = ShockerPool(api, DEVICES, window=window, rate=1e9, burst=10**9)
+    daemon = DispatchDaemon(pool, CommandSpool(spool_path), grace=0)
+    await daemon.start(socket_path)
+    return daemon, DaemonClient(socket_path, DEVICES)
+
+
+async def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        await asyncio.sleep(0.01)
+
+
+def test_command_waiting_in_the_queue_is_replayed_after_a_crash(paths):
+    api = FakeAPI()
+
+    async def main():
+        # a long merging window keeps the command queued
+        daemon, client = await start_daemon(paths, api, window=5)
+        send = asyncio.create_task(client.send("shock", 1, 10))
+        await wait_for(lambda: client.acked == 1)
+        # what a restart after a crash would find
+        recovered = CommandSpool(paths[1]).recover()
+        send.cancel()
+        client.close()
+        await daemon.close()
+        return recovered
+
+    recovered = asyncio.run(main())
+    assert [(c.op, c.mode, c.duration, c.intensity) for c in recovered] == [("send", "shock", 1, 10)]
+    assert api.calls == []
+
+
+def test_command_whose_call_started_is_never_replayed(paths):
+    api = FakeAPI()
+    api.release.clear()
+
+    async def main():
+        daemon, client = await start_daemon(paths, api, window=0)
+        send = asyncio.create_task(client.send("shock", 1, 10))
+        await asyncio.to_thread(api.started.wait, 2)
+        recovered = CommandSpool(paths[1]).recover()
+        api.release.set()
+        results = await send
+        client.close()
+        await daemon.close()
+        return recovered, results
+
+    recovered, results = asyncio.run(main())
+    assert recovered == []
+    assert results[0].result.status == "sent"
+    assert api.calls == [("shock", 1, 10)]
+
+
+def test_shutdown_keeps_queued_commands_for_the_next_start(paths):
+    api = FakeAPI()
+
+    async def main():
+        daemon, client = await start_daemon(paths, api, window=5)
+        asyncio.create_task(client.send("vibrate", 2, 30))
+        await wait_for(lambda: client.acked == 1)
+        await daemon.close()
+        client.close()
+
+        daemon, client = await start_daemon(paths, api, window=0)
+        await wait_for(lambda: daemon.completed == 1)
+        replayed = daemon.replayed
+        client.close()
+        await daemon.close()
+        return replayed
+
+    assert asyncio.run(main()) == 1
+    assert api.calls == [("vibrate", 2, 30)]
+
+
+@pytest.mark.parametrize(
+    "mode, duration, intensity",
+    [("shock", 1, 0), ("shock", 1, -5), ("shock", 1, 101), ("shock", 0, 10), ("shock", 16, 10), ("zap", 1, 10)],
+)
+def test_invalid_commands_are_rejected_before_the_spool(paths, mode, duration, intensity):
+    api = FakeAPI()
+
+    async def main():
+        daemon, client = await start_daemon(paths, api, window=0)
+        results = await client.send(mode, duration, intensity)
+        spooled = daemon.acked
+        client.close()
+        await daemon.close()
+        return results, spooled
+
+    results, spooled = asyncio.run(main())
+    assert results[0].error is not None
+    assert spooled == 0
+    assert api.calls == []
+
+
+def test_socket_is_owner_only(paths):
+    async def main():
+        daemon, client = await start_daemon(paths, FakeAPI(), window=0)
+        mode = stat.S_IMODE(os.stat(paths[0]).st_mode)
+        client.close()
+        await daemon.close()
+        return mode
+
+    assert asyncio.run(main()) == 0o600
@@ -0,0 +1,225 @@
+import os
+
+import psutil
+import pytest
+
+from utils.supervisor import BotSupervisor
+
+
+class FakeProcess:
+    def __init__(self, command, **kwargs):
+        self.command = command
+        self.pid = 4242 + len(FakeProcess.started)
+        self.returncode = None
+        self.signals = []
+        FakeProcess.started.append(self)
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.signals.append("terminate")
+
+    def kill(self):
+        self.signals.append("kill")
+        self.returncode = -9
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("utils.supervisor.time.monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def supervisor(tmp_path, monkeypatch, clock):
+    FakeProcess.started = []
+    monkeypatch.setattr("utils.supervisor.subprocess.Popen", FakeProcess)
+    return BotSupervisor(
+        pid_file=str(tmp_path / "bot.pid"),
+        output_file=str(tmp_path / "bot_output.log"),
+        stop_timeout=5,
+        max_backoff=8,
+    )
+
+
+def read_pid(supervisor):
+    with open(supervisor.pid_file) as f:
+        return int(f.read())
+
+
+def test_start_writes_the_pid_file(supervisor):
+    supervisor.start()
+    assert supervisor.state == "running"
+    assert read_pid(supervisor) == supervisor.pid
+
+    supervisor.start()
+    assert len(FakeProcess.started) == 1
+
+
+def test_stop_terminates_and_doesnt_restart(supervisor, clock):
+    supervisor.start()
+    process = supervisor.process
+    supervisor.stop()
+    assert process.signals == ["terminate"]
+    assert supervisor.state == "stopping"
+
+    process.returncode = 0
+    assert supervisor.poll() == 0
+    assert supervisor.state == "stopped"
+    assert not os.path.exists(supervisor.pid_file)
+
+    clock.now += 60
+    supervisor.poll()
+    assert len(FakeProcess.started) == 1
+
+
+def test_stop_kills_a_bot_that_doesnt_exit_in_time(supervisor, clock):
+    supervisor.start()
+    process = supervisor.process
+    supervisor.stop()
+
+    clock.now += 4
+    assert supervisor.poll() is None
+    assert process.signals == ["terminate"]
+    clock.now += 1
+    supervisor.poll()
+    assert process.signals == ["terminate", "kill"]
+    assert supervisor.poll() == -9
+    assert supervisor.state == "stopped"
+
+
+def test_crashes_restart_with_exponential_backoff(supervisor, clock):
+    supervisor.start()
+    delays = []
+    for _ in range(5):
+        supervisor.process.returncode = 1
+        assert supervisor.poll() == 1
+        crashed_at, started = clock.now, len(FakeProcess.started)
+        while len(FakeProcess.started) == started:
+            clock.now += 0.5
+            supervisor.poll()
+        delays.append(clock.now - crashed_at)
+
+    assert delays == [1, 2, 4, 8, 8]
+    assert supervisor.restarts == 5
+
+
+def test_backoff_resets_after_a_long_run(supervisor, clock):
+    supervisor.start()
+    for _ in range(3):
+        supervisor.process.returncode = 1
+        supervisor.poll()
+        clock.now += 10
+        supervisor.poll()
+
+    # ran for longer than max_backoff before crashing again
+    clock.now += 9
+    supervisor.process.returncode = 1
+    supervisor.poll()
+    assert supervisor.state == "restarting in 1s"
+
+
+def test_clean_exit_isnt_restarted(supervisor, clock):
+    supervisor.start()
+    supervisor.process.returncode = 0
+    assert supervisor.poll() == 0
+    clock.now += 60
+    supervisor.poll()
+    assert supervisor.state == "stopped"
+    assert len(FakeProcess.started) == 1
+
+
+def test_no_restart_when_auto_restart_is_off(supervisor, clock):
+    supervisor.auto_restart = False
+    supervisor.start()
+    supervisor.process.returncode = 1
+    supervisor.poll()
+    clock.now += 60
+    supervisor.poll()
+    assert supervisor.state == "stopped"
+
+
+def test_restart_starts_again_on_the_next_poll(supervisor):
+    supervisor.start()
+    first = supervisor.process
+    supervisor.restart()
+    first.returncode = 0
+    supervisor.poll()
+    supervisor.poll()
+    assert supervisor.process is not first
+    assert supervisor.restarts == 1
+
+
+class FakePsutilProcess:
+    terminated = []
+
+    def __init__(self, pid, cmdline):
+        self.pid = pid
+        self._cmdline = cmdline
+
+    def cmdline(self):
+        return self._cmdline
+
+    def terminate(self):
+        FakePsutilProcess.terminated.append(self.pid)
+
+
+@pytest.fixture
+def orphans(monkeypatch):
+    FakePsutilProcess.terminated = []
+    table = {}
+
+    def process(pid):
+        if pid not in table:
+            raise psutil.NoSuchProcess(pid)
+        return FakePsutilProcess(pid, table[pid])
+
+    monkeypatch.setattr("utils.supervisor.psutil.Process", process)
+    return table
+
+
+def test_start_stops_the_bot_left_by_a_previous_gui(supervisor, orphans):
+    orphans[777] = ["python", "main.py"]
+    with open(supervisor.pid_file, "w") as f:
+        f.write("777")
+
+    supervisor.start()
+    assert FakePsutilProcess.terminated == [777]
+    assert read_pid(supervisor) == supervisor.pid
+
+
+def test_a_reused_pid_isnt_terminated(supervisor, orphans):
+    orphans[777] = ["firefox"]
+    with open(supervisor.pid_file, "w") as f:
+        f.write("777")
+
+    supervisor.stop_orphan()
+    assert FakePsutilProcess.terminated == []
+
+
+def test_the_pid_file_of_a_bot_that_already_exited_is_removed(supervisor, orphans):
+    with open(supervisor.pid_file, "w") as f:
+        f.write("999")
+
+    supervisor.stop_orphan()
+    assert FakePsutilProcess.terminated == []
+    assert not os.path.exists(supervisor.pid_file)
+
+
+def test_a_broken_pid_file_is_ignored(supervisor, orphans):
+    with open(supervisor.pid_file, "w") as f:
+        f.write("not a pid")
+
+    supervisor.start()
+    assert FakePsutilProcess.terminated == []
+    assert read_pid(supervisor) == supervisor.pid
@@ -0,0 +1,79 @@
+import logging
+from typing import Iterable, Optional
+
+
+def to_id(value, where: str) -> Optional[int]:
+    """the value as a Discord id, or None (logged) when it isn't one"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        logging.error(f"Error: skipped invalid id {value!r} in {where} of whitelist.json.")
+        return None
+
+
+def _ids(values, where: str) -> list:
+    if not isinstance(values, list):
+        return []
+    ids = (to_id(value, where) for value in values)
+    return [i for i in ids if i is not None]
+
+
+class AccessIndex(frozenset):
+    """The whitelist: every user id that may trigger, plus where each may.
+
+    ``whitelist.json`` can limit triggering to some guilds or channels, and
+    give users access to just one guild or channel with ``scopes``::
+
+        {"whitelist": [123], "guilds": [111], "channels": [222],
+         "scopes": {"333": [456]}}
+
+    Here 123 triggers in guild 111 and channel 222 only, and 456 only in the
+    guild or channel 333. Without ``guilds`` and ``channels``, whitelisted
+    users trigger everywhere. Guild and channel ids never collide, so they
+    share one set, and every check is a hash lookup. Being a set of all the
+    user ids, ``user_id in index`` rejects everyone else in one lookup.
+    """
+
+    def __new__(
+        cls,
+        anywhere: Iterable[int] = (),
+        places: Optional[Iterable[int]] = None,
+        scoped: Iterable[tuple[int, int]] = (),
+    ):
+        anywhere = frozenset(anywhere)
+        scoped = frozenset(scoped)
+        index = super().__new__(cls, anywhere | {user_id for _, user_id in scoped})
+        index.anywhere = anywhere
+        index.places = frozenset(places) if places is not None else None
+        index.scoped = scoped
+        return index
+
+    @classmethod
+    def from_data(cls, data) -> "AccessIndex":
+        if not isinstance(data, dict):
+            return cls()
+        places = None
+        if "guilds" in data or "channels" in data:
+            places = _ids(data.get("guilds"), "guilds") + _ids(data.get("channels"), "channels")
+        scopes = data.get("scopes")
+        scoped = []
+        if isinstance(scopes, dict):
+            for place, user_ids in scopes.items():
+                place = to_id(place, "scopes")
+                if place is not None:
+                    scoped.extend((place, user_id) for user_id in _ids(user_ids, "scopes"))
+        return cls(_ids(data.get("whitelist"), "whitelist"), places, scoped)
+
+    def allows(self, user_id: int, *places: Optional[int]) -> bool:
+        """whether the user may trigger in a message sent in ``places`` (its guild, channel and parent channel)"""
+        if user_id in self.anywhere:
+            if self.places is None:
+                return True
+            for place in places:
+                if place in self.places:
+                    return True
+        if self.scoped:
+            for place in places:
+                if (place, user_id) in self.scoped:
+                    return True
+        return False
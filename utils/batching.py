@@ -0,0 +1,51 @@
+import queue
+import threading
+
+_STOP = object()
+
+
+class BatchWorker:
+    """Background thread that drains a queue and hands ``write`` what has queued up.
+
+    Each call gets at most ``batch_size`` items, so a burst is written in a
+    few large batches while a single item still goes out straight away.
+    """
+
+    def __init__(self, name: str, write, batch_size: int, item_queue: queue.SimpleQueue = None):
+        self.queue = item_queue if item_queue is not None else queue.SimpleQueue()
+        self.write = write
+        self.batch_size = batch_size
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def put(self, item) -> None:
+        self.queue.put(item)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch = []
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self.write(batch)
+            if stop:
+                return
+
+    def stop(self) -> None:
+        """writes what's queued and stops the thread"""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
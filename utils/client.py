@@ -0,0 +1,36 @@
+import os
+
+import discord
+
+PROFILES = ("default", "lean")
+LEAN_MAX_MESSAGES = 200
+
+
+def client_options(profile: str) -> dict:
+    """the discord.py-self client settings for a runtime profile
+
+    ``default`` keeps the library's defaults. ``lean`` keeps only what the
+    shock cog reads, message content and author ids: a small message cache
+    (edits arrive as raw events, which don't need it), no member cache besides
+    our own member, no member list chunking and no guild subscriptions at
+    startup, which otherwise cost gateway requests per guild before ``on_ready``.
+    Typing, activity and thread member list events aren't received in lean mode.
+    """
+    if profile == "default":
+        return {}
+    if profile == "lean":
+        return {
+            "max_messages": int(os.getenv("MAX_MESSAGES", LEAN_MAX_MESSAGES)),
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "request_guilds": False,
+        }
+    raise ValueError(f"Unknown client profile `{profile}`, use one of {', '.join(PROFILES)}.")
+
+
+def pick_profile(cogs) -> str:
+    """``CLIENT_PROFILE`` if set, otherwise lean when the shock cog is all that's loaded"""
+    profile = os.getenv("CLIENT_PROFILE")
+    if profile:
+        return profile
+    return "lean" if set(cogs) == {"shock"} else "default"
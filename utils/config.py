@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import time
+
+from dotenv import dotenv_values
+
+from utils.access import AccessIndex
+from utils.files import WriteBehind, atomic_write
+
+_UNLOADED = object()
+
+
+class WatchedJson:
+    """A JSON file kept in memory and reloaded when it changes on disk.
+
+    Changes are detected by polling the file's mtime and size, at most once
+    every ``poll_interval`` seconds, so reads are served from memory.
+    """
+
+    def __init__(self, path: str, parse, poll_interval: float = 1.0):
+        self.path = path
+        self.parse = parse
+        self.poll_interval = poll_interval
+        self.data = None
+        self.value = parse(None)
+        self.pending = False
+        self._signature = _UNLOADED
+        self._next_check = 0.0
+        self.reloads = 0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def invalidate(self) -> None:
+        """forces a check on the next read"""
+        self._next_check = 0.0
+
+    def set(self, data) -> None:
+        """replaces the contents in memory, ``flush`` writes them out"""
+        self.data = data
+        self.value = self.parse(data)
+        self.pending = True
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        data = self.data
+        atomic_write(self.path, json.dumps(data, indent=4))
+        # a set() that landed mid-write still needs flushing
+        if self.data is data:
+            self.pending = False
+            # don't reload our own write
+            self._signature = self._stat()
+
+    def get(self):
+        now = time.monotonic()
+        if self.pending or now < self._next_check:
+            return self.value
+        self._next_check = now + self.poll_interval
+
+        signature = self._stat()
+        if signature == self._signature:
+            return self.value
+
+        data = None
+        if signature is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except json.JSONDecodeError as e:
+                # keep serving the last good copy, the file may be mid-write
+                logging.error(f"Error loading JSON: {e}")
+                return self.value
+            except FileNotFoundError:
+                data = None
+        else:
+            logging.error(f"Error: File {self.path} not found.")
+
+        self.data = data
+        self.value = self.parse(data)
+        self._signature = signature
+        self.reloads += 1
+        return self.value
+
+
+def _parse_whitelist(data) -> AccessIndex:
+    return AccessIndex.from_data(data)
+
+
+def _parse_wordlist(data) -> tuple:
+    words = data.get("words", []) if isinstance(data, dict) else []
+    return tuple(word for word in words if word)
+
+
+class ConfigCache:
+    """In-memory view of the whitelist and wordlist files."""
+
+    def __init__(
+        self,
+        whitelist_file: str = "whitelist.json",
+        wordlist_file: str = "wordlist.json",
+        poll_interval: float = 1.0,
+    ):
+        self._whitelist = WatchedJson(whitelist_file, _parse_whitelist, poll_interval)
+        self._wordlist = WatchedJson(wordlist_file, _parse_wordlist, poll_interval)
+
+    @property
+    def whitelist(self) -> AccessIndex:
+        return self._whitelist.get()
+
+    @property
+    def whitelist_data(self) -> dict:
+        """the whitelist file as loaded, including keys other than the ids"""
+        self._whitelist.get()
+        return self._whitelist.data if isinstance(self._whitelist.data, dict) else {}
+
+    @property
+    def wordlist_data(self) -> dict:
+        """the wordlist file as loaded, including trigger rules"""
+        self._wordlist.get()
+        return self._wordlist.data if isinstance(self._wordlist.data, dict) else {}
+
+    @property
+    def whitelist_ids(self) -> list:
+        """the whitelist in file order, for display"""
+        ids = []
+        user_ids = self.whitelist_data.get("whitelist")
+        for user_id in user_ids if isinstance(user_ids, list) else []:
+            try:
+                ids.append(int(user_id))
+            except (TypeError, ValueError):
+                pass  # logged when the file was loaded
+        return ids
+
+    @property
+    def words(self) -> tuple:
+        return self._wordlist.get()
+
+    def invalidate(self) -> None:
+        """makes the next read pick up changes written by this process"""
+        self._whitelist.invalidate()
+        self._wordlist.invalidate()
+
+
+def _format_env_value(value: str) -> str:
+    if value and not any(ch in value for ch in " #\"'\\"):
+        return value
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class EnvFile:
+    """The .env file, kept as one line per key.
+
+    The bot and the GUI each have one, so ``flush`` rereads the file and
+    only overwrites the keys changed through ``set``, keeping whatever the
+    other process saved in the meantime.
+    """
+
+    def __init__(self, path: str = ".env"):
+        self.path = path
+        self.values = self._read()
+        self.changed = {}
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        # later duplicates win, same as load_dotenv
+        return {k: v for k, v in dotenv_values(self.path).items() if v is not None}
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.changed)
+
+    def set(self, **values: str) -> None:
+        for key, value in values.items():
+            os.environ[key] = value
+            if self.values.get(key) != value:
+                self.values[key] = value
+                self.changed[key] = value
+
+    def flush(self) -> None:
+        if not self.changed:
+            return
+        changed = dict(self.changed)
+        values = {**self._read(), **changed}
+        text = "".join(f"{k}={_format_env_value(v)}\n" for k, v in values.items())
+        atomic_write(self.path, text)
+        # a set() that landed mid-write still needs flushing
+        for key, value in changed.items():
+            if self.changed.get(key) == value:
+                del self.changed[key]
+        self.values = {**values, **self.changed}
+
+
+class ConfigStore(ConfigCache):
+    """Config shared by the bot and the GUI with write-behind persistence.
+
+    Changes apply in memory straight away. Inside an event loop they're
+    written ``flush_delay`` seconds later in one batch, off the loop thread;
+    outside one (the GUI) call ``flush`` to write them. Every write is an
+    atomic replace.
+    """
+
+    def __init__(
+        self,
+        whitelist_file: str = "whitelist.json",
+        wordlist_file: str = "wordlist.json",
+        env_file: str = ".env",
+        poll_interval: float = 1.0,
+        flush_delay: float = 1.0,
+    ):
+        super().__init__(whitelist_file, wordlist_file, poll_interval)
+        self.env = EnvFile(env_file)
+        self.flush_delay = flush_delay
+        self._write_behind = WriteBehind(self.flush, flush_delay, what="config")
+
+    def _changed(self) -> None:
+        self._write_behind.schedule()
+
+    def set_whitelist(self, user_ids) -> None:
+        data = {**self.whitelist_data, "whitelist": [int(user_id) for user_id in user_ids]}
+        self._whitelist.set(data)
+        self._changed()
+
+    def set_words(self, words) -> None:
+        # keeps the rules and any other keys next to the words
+        self._wordlist.set({**self.wordlist_data, "words": list(words)})
+        self._changed()
+
+    def add_word(self, word: str) -> bool:
+        """returns False if the word was already in the list"""
+        words = list(self.words)
+        if word in words:
+            return False
+        self.set_words(words + [word])
+        return True
+
+    def remove_word(self, word: str) -> bool:
+        """returns False if the word wasn't in the list"""
+        words = list(self.words)
+        if word not in words:
+            return False
+        words.remove(word)
+        self.set_words(words)
+        return True
+
+    def set_env(self, **values: str) -> None:
+        self.env.set(**values)
+        self._changed()
+
+    def flush(self) -> None:
+        """writes every pending change now"""
+        self._whitelist.flush()
+        self._wordlist.flush()
+        self.env.flush()
+
+    def close(self) -> None:
+        self._write_behind.cancel()
+        self.flush()
@@ -0,0 +1,285 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+
+from utils.dispatch import Device, DeviceResult, DispatchResult, ShockCommand, ShockerPool
+from utils.resilience import CircuitBreaker
+from utils.rules import MAX_DURATION, MAX_INTENSITY, MIN_DURATION, MIN_INTENSITY, MODES
+from utils.spool import CommandSpool, SpooledCommand
+
+SOCKET_FILE = "dispatch.sock"
+
+# the error for commands waiting on an answer when the connection drops
+_LOST = "Lost the connection to the dispatch daemon, the command may still be sent."
+
+
+def _encode_results(results: list[DeviceResult]) -> list[dict]:
+    return [
+        {
+            "device": outcome.device.code,
+            "status": outcome.result.status if outcome.result else None,
+            "command": list(outcome.result.command) if outcome.result else None,
+            "batch_size": outcome.result.batch_size if outcome.result else None,
+            "error": str(outcome.error) if outcome.error is not None else None,
+        }
+        for outcome in results
+    ]
+
+
+class DispatchDaemon:
+    """Owns the PiShock pool in its own process, see ``dispatchd.py``.
+
+    The bot sends JSON lines over a Unix socket::
+
+        {"id": 1, "op": "send", "mode": "shock", "duration": 1, "intensity": 10}
+
+    ``send`` goes through the merging queues like a trigger, ``direct``
+    skips them like a pattern step and ``stats`` returns the queue and API
+    stats. Each command is answered twice: ``{"id": 1, "ack": "queued"}``
+    once it's in the spool, then ``{"id": 1, "results": [...]}`` per device
+    once it's sent. Commands keep going if the bot disconnects, only the
+    answers are lost.
+    """
+
+    def __init__(self, pool: ShockerPool, spool: CommandSpool, grace: float = 5):
+        self.pool = pool
+        self.spool = spool
+        self.grace = grace
+        self.path = None
+        self.acked = 0
+        self.completed = 0
+        self.replayed = 0
+        self._server = None
+        self._tasks: set[asyncio.Task] = set()
+        # open connections and the tasks reading them
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self, path: str = SOCKET_FILE) -> None:
+        """replays what the spool kept from the last run, then starts listening"""
+        for command in await asyncio.to_thread(self.spool.recover):
+            logging.info(f"Replaying {command}.")
+            self.replayed += 1
+            self._spawn(self._dispatch(command))
+
+        if os.path.exists(path):
+            # left behind by a crash, nothing can be listening on it
+            os.unlink(path)
+        self.path = path
+        # created owner-only, so other local users can't connect even briefly
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        finally:
+            os.umask(umask)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def reply(message: dict) -> None:
+            if not writer.is_closing():
+                writer.write((json.dumps(message) + "\n").encode())
+
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    reply({"id": None, "error": "Invalid JSON."})
+                    continue
+                self._spawn(self._serve(request, reply))
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _serve(self, request: dict, reply) -> None:
+        request_id = request.get("id")
+        op = request.get("op")
+        if op == "stats":
+            reply({"id": request_id, "stats": self.stats(), "breaker": self.pool.breaker.state})
+            return
+        if op not in ("send", "direct"):
+            reply({"id": request_id, "error": f"Unknown op `{op}`."})
+            return
+        try:
+            mode = str(request["mode"])
+            duration = int(request["duration"])
+            intensity = int(request["intensity"])
+        except (KeyError, TypeError, ValueError):
+            reply({"id": request_id, "error": "Invalid command."})
+            return
+        if mode not in MODES:
+            reply({"id": request_id, "error": f"Unknown mode `{mode}`."})
+            return
+        if not (MIN_INTENSITY <= intensity <= MAX_INTENSITY and MIN_DURATION <= duration <= MAX_DURATION):
+            reply({"id": request_id, "error": "Invalid format. Ensure shock (1-100) and duration (1-15)."})
+            return
+
+        command = await asyncio.to_thread(self.spool.add, op, mode, duration, intensity)
+        self.acked += 1
+        reply({"id": request_id, "ack": "queued"})
+        results = await self._dispatch(command)
+        reply({"id": request_id, "results": _encode_results(results), "breaker": self.pool.breaker.state})
+
+    async def _dispatch(self, command: SpooledCommand) -> list[DeviceResult]:
+        async def claim():
+            # right before the API call, so a crash while the command waits
+            # in the queue still replays it, and one after never does
+            await asyncio.to_thread(self.spool.claim, command.id)
+
+        send = self.pool.send_direct if command.op == "direct" else self.pool.send
+        results = await send(command.mode, command.duration, command.intensity, claim)
+        # a command cancelled on shutdown stays in the spool for the next start
+        await asyncio.to_thread(self.spool.done, command.id)
+        self.completed += 1
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "queues": {code: queue.stats() for code, queue in self.pool.queues.items()},
+            "api": self.pool.resilience.stats(),
+            "acked": self.acked,
+            "completed": self.completed,
+            "replayed": self.replayed,
+            "spooled": len(self.spool),
+        }
+
+    async def close(self) -> None:
+        """stops listening and gives commands in flight ``grace`` seconds to finish"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=self.grace)
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        readers = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*readers, return_exceptions=True)
+        self.pool.close()
+        self.spool.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RemoteBreaker:
+    """The daemon's circuit breaker state, as of its last answer."""
+
+    def __init__(self, on_change=None):
+        self.state = CircuitBreaker.CLOSED
+        self.on_change = on_change
+
+    def update(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_change:
+            self.on_change(state)
+
+
+class DaemonClient:
+    """Sends commands to the dispatch daemon, with the same calls as ``ShockerPool``.
+
+    Connects on first use and again after the daemon restarts. The queues
+    live in the daemon, so ``queues`` is empty and ``stats`` asks for them.
+    """
+
+    def __init__(self, path: str, devices: list[Device], on_breaker_change=None):
+        self.path = path
+        self.devices = {device.code: device for device in devices}
+        self.queues = {}
+        self.breaker = RemoteBreaker(on_breaker_change)
+        self.acked = 0
+        self._writer = None
+        self._listener = None
+        self._waiting: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                try:
+                    reader, self._writer = await asyncio.open_unix_connection(self.path)
+                except OSError as e:
+                    raise ConnectionError(
+                        f"Could not reach the dispatch daemon on {self.path}, is dispatchd.py running?"
+                    ) from e
+                self._listener = asyncio.create_task(self._listen(reader, self._writer))
+            return self._writer
+
+    async def _listen(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                if "breaker" in reply:
+                    self.breaker.update(reply["breaker"])
+                if "ack" in reply:
+                    self.acked += 1
+                    continue
+                future = self._waiting.pop(reply.get("id"), None)
+                if future and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logging.error(f"Error reading from the dispatch daemon: {e}")
+        finally:
+            # the next request reconnects
+            writer.close()
+            self._fail_waiting(ConnectionError(_LOST))
+
+    def _fail_waiting(self, error: Exception) -> None:
+        waiting, self._waiting = self._waiting, {}
+        for future in waiting.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _request(self, **request) -> dict:
+        writer = await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        writer.write((json.dumps({"id": request_id, **request}) + "\n").encode())
+        reply = await future
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def _result(self, item: dict) -> DeviceResult:
+        device = self.devices.get(item["device"]) or Device(item["device"])
+        if item["error"] is not None:
+            return DeviceResult(device, error=RuntimeError(item["error"]))
+        return DeviceResult(
+            device, DispatchResult(item["status"], ShockCommand(*item["command"]), item["batch_size"])
+        )
+
+    async def _send(self, op: str, mode: str, duration: int, intensity: int) -> list[DeviceResult]:
+        try:
+            reply = await self._request(op=op, mode=mode, duration=duration, intensity=intensity)
+        except (OSError, RuntimeError) as e:
+            return [DeviceResult(device, error=e) for device in self.devices.values()]
+        return [self._result(item) for item in reply["results"]]
+
+    async def send(self, mode: str, duration: int, intensity: int) -> list[DeviceResult]:
+        return await self._send("send", mode, duration, intensity)
+
+    async def send_direct(self, mode: str, duration: int, intensity: int) -> list[DeviceResult]:
+        return await self._send("direct", mode, duration, intensity)
+
+    async def stats(self) -> dict:
+        return (await self._request(op="stats"))["stats"]
+
+    def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        if self._writer:
+            self._writer.close()
+        self._fail_waiting(ConnectionError(_LOST))
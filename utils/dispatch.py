@@ -0,0 +1,467 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+import pishock
+import requests
+from pishock import PiShockAPI
+from pishock.zap.httpapi import HTTPError, NAME
+from requests.adapters import HTTPAdapter
+
+from utils import metrics
+from utils.resilience import CircuitBreaker, ResiliencePolicy
+from utils.transport import SerialTransport
+
+API_URL = "https://do.pishock.com/api"
+
+
+class PooledPiShockAPI(PiShockAPI):
+    """PiShockAPI that keeps one HTTP session alive instead of reconnecting per call."""
+
+    def __init__(
+        self,
+        username: str,
+        api_key: str,
+        api_url: str = API_URL,
+        timeout: float = 10,
+        pool_size: int = 4,
+    ):
+        super().__init__(username, api_key)
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = f"{NAME}/{pishock.__version__}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, endpoint: str, params: dict) -> requests.Response:
+        params = {
+            "Username": self.username,
+            "Apikey": self.api_key,
+            **params,
+        }
+        response = self.session.post(
+            f"{self.api_url}/{endpoint}", json=params, timeout=self.timeout
+        )
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise HTTPError(e) from e
+
+        return response
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class ShockDispatcher:
+    """Sends commands to one shocker without blocking the event loop.
+
+    The pishock library is synchronous, so every call runs in a small,
+    bounded thread pool. The shocker handle is created once and reused.
+    """
+
+    MODES = ("shock", "vibrate", "beep")
+
+    def __init__(
+        self,
+        api: PiShockAPI,
+        code: str,
+        max_workers: int = 2,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        self.api = api
+        self.code = code
+        self.shocker = api.shocker(code)
+        # a shared executor (and api) belongs to whoever passed it in
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pishock"
+        )
+
+    def _call(self, mode: str, duration: int, intensity: int) -> None:
+        if mode == "beep":
+            self.shocker.beep(duration=duration)
+        else:
+            getattr(self.shocker, mode)(duration=duration, intensity=intensity)
+
+    async def send(self, mode: str, duration: int, intensity: int) -> None:
+        """runs one operation in the pool, raising whatever the library raised"""
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(
+                self._executor, functools.partial(self._call, mode, duration, intensity)
+            )
+        except Exception:
+            metrics.dispatch_errors.inc()
+            raise
+        finally:
+            metrics.dispatch_seconds.observe(time.perf_counter() - start)
+
+    def close(self) -> None:
+        if not self._owns_executor:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self.api, "close"):
+            self.api.close()
+
+
+class Device(NamedTuple):
+    code: str
+    mode: Optional[str] = None  # forces every command to this mode
+    max_intensity: int = 100
+    max_duration: int = 15
+
+    def limit(self, command: "ShockCommand") -> "ShockCommand":
+        return ShockCommand(
+            self.mode or command.mode,
+            min(command.duration, self.max_duration),
+            min(command.intensity, self.max_intensity),
+        )
+
+
+def parse_devices(value: str) -> list[Device]:
+    """parses ``SHOCKER_CODE``, a comma separated list of ``code[:mode[:max intensity[:max duration]]]``
+
+    e.g. ``abc123,def456:vibrate:40:5``
+    """
+    devices = []
+    for entry in (value or "").split(","):
+        parts = [part.strip() for part in entry.split(":")]
+        if not parts[0]:
+            continue
+        mode = parts[1] if len(parts) > 1 and parts[1] else None
+        if mode is not None and mode not in ShockDispatcher.MODES:
+            raise ValueError(f"Unknown mode `{mode}` for shocker {parts[0]}")
+        devices.append(
+            Device(
+                parts[0],
+                mode,
+                int(parts[2]) if len(parts) > 2 and parts[2] else 100,
+                int(parts[3]) if len(parts) > 3 and parts[3] else 15,
+            )
+        )
+    return devices
+
+
+class ShockCommand(NamedTuple):
+    mode: str
+    duration: int
+    intensity: int
+
+
+class DispatchResult(NamedTuple):
+    status: str  # "sent", "merged" or "dropped"
+    command: ShockCommand
+    batch_size: int = 1
+
+
+class TokenBucket:
+    """Allows ``capacity`` commands at once, refilling at ``rate`` per second.
+
+    A ``rate`` of 0 turns the limit off.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate < 0:
+            raise ValueError(f"Rate can't be negative: {rate}")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """seconds until a token is available"""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if not self.rate:
+            return
+        self._refill()
+        self.tokens -= 1
+
+
+class DispatchQueue:
+    """Coalesces bursts of commands for one device into single API calls.
+
+    Requests arriving within ``window`` seconds, or while the device is rate
+    limited, are merged into one command using ``policy``:
+
+    - ``max``: the request with the highest intensity, then duration. Only
+      requests of the same mode are merged, the others wait for the next call
+    - ``latest``: the most recent request
+
+    Only one call per device is ever in flight, and at most ``max_pending``
+    requests wait for it; anything past that is dropped. A request's
+    ``on_send`` is awaited right before the call it's part of starts.
+    """
+
+    POLICIES = ("max", "latest")
+
+    def __init__(
+        self,
+        send,
+        window: float = 0.25,
+        policy: str = "max",
+        rate: float = 0.5,
+        burst: int = 2,
+        max_pending: int = 32,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.send = send
+        self.window = window
+        self.policy = policy
+        self.bucket = TokenBucket(rate, burst)
+        self.max_pending = max_pending
+        self._pending: list[tuple[ShockCommand, asyncio.Future, Optional[Callable]]] = []
+        self._batch = []  # the requests in the call being sent
+        self._worker = None
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def submit(
+        self, mode: str, duration: int, intensity: int, on_send: Optional[Callable] = None
+    ) -> DispatchResult:
+        """queues a command and waits until it (or the command it merged into) is sent"""
+        command = ShockCommand(mode, duration, intensity)
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            logging.info(f"Dropped {command}, queue is full.")
+            return DispatchResult("dropped", command)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((command, future, on_send))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await future
+
+    def _take_batch(self) -> list:
+        """removes the requests the next call carries from ``_pending``"""
+        if self.policy == "latest":
+            batch, self._pending = self._pending, []
+            return batch
+        # a vibrate never replaces a shock, whatever the intensities
+        mode = self._pending[0][0].mode
+        batch = [entry for entry in self._pending if entry[0].mode == mode]
+        self._pending = [entry for entry in self._pending if entry[0].mode != mode]
+        return batch
+
+    def _merge(self, commands: list[ShockCommand]) -> ShockCommand:
+        if self.policy == "latest":
+            return commands[-1]
+        return max(commands, key=lambda c: (c.intensity, c.duration))
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.window)
+            delay = self.bucket.delay()
+            if delay:
+                await asyncio.sleep(delay)
+
+            batch = self._batch = self._take_batch()
+            chosen = self._merge([command for command, _, _ in batch])
+            self.bucket.take()
+            try:
+                for _, _, on_send in batch:
+                    if on_send:
+                        await on_send()
+                await self.send(*chosen)
+            except Exception as e:
+                self.failed += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._batch = []
+
+            self.sent += 1
+            self.merged += len(batch) - 1
+            for command, future, _ in batch:
+                if not future.done():
+                    status = "sent" if command is chosen else "merged"
+                    future.set_result(DispatchResult(status, chosen, len(batch)))
+
+    def close(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+        # the batch being sent is cancelled too, its callers would wait forever otherwise
+        for _, future, _ in self._batch + self._pending:
+            future.cancel()
+        self._batch = []
+        self._pending = []
+
+
+class DeviceResult(NamedTuple):
+    device: Device
+    result: Optional[DispatchResult] = None
+    error: Optional[Exception] = None
+
+
+class ShockerPool:
+    """Every configured device, sharing one API session and one thread pool.
+
+    Each device keeps its own dispatch queue, so a trigger fans out to all of
+    them at once and takes about as long as the slowest device. Every API call
+    goes through one ``ResiliencePolicy``, so the devices share its in-flight
+    cap and circuit breaker.
+    """
+
+    def __init__(
+        self,
+        api: PiShockAPI,
+        devices: list[Device],
+        resilience: ResiliencePolicy | None = None,
+        **queue_options,
+    ):
+        self.api = api
+        self.resilience = resilience or ResiliencePolicy()
+        self.devices = {device.code: device for device in devices}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.devices)), thread_name_prefix="pishock"
+        )
+        self.dispatchers = {
+            code: ShockDispatcher(api, code, executor=self._executor)
+            for code in self.devices
+        }
+        self._senders = {
+            code: self.resilience.wrap(dispatcher.send)
+            for code, dispatcher in self.dispatchers.items()
+        }
+        self.queues = {
+            code: DispatchQueue(send, **queue_options) for code, send in self._senders.items()
+        }
+
+    @property
+    def breaker(self):
+        return self.resilience.breaker
+
+    async def _send_one(self, device: Device, command: ShockCommand, on_send) -> DeviceResult:
+        try:
+            result = await self.queues[device.code].submit(*device.limit(command), on_send)
+        except Exception as e:
+            return DeviceResult(device, error=e)
+        return DeviceResult(device, result)
+
+    async def send(
+        self, mode: str, duration: int, intensity: int, on_send: Optional[Callable] = None
+    ) -> list[DeviceResult]:
+        """sends to every device concurrently and collects each outcome
+
+        ``on_send`` is awaited before each device's API call that carries the
+        command, after it has waited in the queue.
+        """
+        command = ShockCommand(mode, duration, intensity)
+        return await asyncio.gather(
+            *(self._send_one(device, command, on_send) for device in self.devices.values())
+        )
+
+    async def _send_direct(self, device: Device, command: ShockCommand, on_send) -> DeviceResult:
+        command = device.limit(command)
+        try:
+            if on_send:
+                await on_send()
+            await self._senders[device.code](*command)
+        except Exception as e:
+            return DeviceResult(device, error=e)
+        return DeviceResult(device, DispatchResult("sent", command))
+
+    async def send_direct(
+        self, mode: str, duration: int, intensity: int, on_send: Optional[Callable] = None
+    ) -> list[DeviceResult]:
+        """like ``send``, but skips the queues' merging and rate limit, for timed patterns"""
+        command = ShockCommand(mode, duration, intensity)
+        return await asyncio.gather(
+            *(self._send_direct(device, command, on_send) for device in self.devices.values())
+        )
+
+    def close(self) -> None:
+        for queue in self.queues.values():
+            queue.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self.api, "close"):
+            self.api.close()
+
+
+async def open_pool(
+    devices: list[Device],
+    username: str = None,
+    apikey: str = None,
+    on_breaker_change=None,
+    transport: str = "http",
+) -> ShockerPool:
+    """creates the PiShock client and pool from the ``PISHOCK_*`` and ``SHOCK_*`` settings
+
+    The ``serial`` transport talks to a USB-attached hub on ``SHOCKER_PORT``
+    instead of the cloud API. Raises whatever setting up the client raised.
+    """
+    timeout = float(os.getenv("PISHOCK_TIMEOUT", 10))
+    if transport == "serial":
+        # opening the port waits for the hub's info
+        api = await asyncio.to_thread(SerialTransport, os.getenv("SHOCKER_PORT") or None)
+    else:
+        api = PooledPiShockAPI(
+            username,
+            apikey,
+            api_url=os.getenv("PISHOCK_API_URL", API_URL),
+            timeout=timeout,
+            pool_size=max(4, len(devices)),
+        )
+    resilience = ResiliencePolicy(
+        timeout=timeout,
+        max_in_flight=int(os.getenv("PISHOCK_MAX_IN_FLIGHT", 4)),
+        retries=int(os.getenv("PISHOCK_RETRIES", 2)),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("PISHOCK_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("PISHOCK_BREAKER_RESET", 30)),
+            on_change=on_breaker_change,
+        ),
+    )
+    try:
+        return ShockerPool(
+            api,
+            devices,
+            resilience=resilience,
+            window=float(os.getenv("SHOCK_WINDOW", 0.25)),
+            policy=os.getenv("SHOCK_POLICY", "max"),
+            rate=float(os.getenv("SHOCK_RATE", 0.5)),
+            burst=int(os.getenv("SHOCK_BURST", 2)),
+        )
+    except Exception:
+        api.close()
+        raise
@@ -0,0 +1,181 @@
+import json
+import re
+from typing import Iterator, Optional, Sequence
+
+from utils.matcher import words_pattern
+
+CHUNK_SIZE = 4 << 20
+
+_MESSAGES_KEY = re.compile(r'"messages"\s*:\s*\[')
+_SKIP = re.compile(r"[\s,]*")
+
+
+class ChatExport:
+    """Streams messages out of a chat export without loading the whole file.
+
+    Understands JSON lines (one message per line), a JSON array of messages
+    and an object with a ``messages`` array, like DiscordChatExporter writes,
+    pretty printed or on a single line.
+
+    For JSON lines, only messages whose raw JSON contains one of the
+    lowercase ``candidates`` (if given) and matches every ``required``
+    pattern, ignoring case, are parsed and yielded. Lines are searched a whole
+    chunk at a time, so files where few messages can match are read at close
+    to disk speed. Arrays have to be parsed in full to find where each message
+    ends, so every message in them is yielded. ``read`` counts every message,
+    including the skipped ones.
+    """
+
+    # up to this many candidates are searched for one by one with str.find,
+    # which beats a combined regex until the list gets long
+    FIND_LIMIT = 8
+
+    def __init__(self, path: str, candidates: Sequence[str] = (), required: Sequence[re.Pattern] = ()):
+        self.path = path
+        self.candidates = [c.lower() for c in candidates if c]
+        self.required = list(required)
+        if len(self.candidates) > self.FIND_LIMIT:
+            self.required.insert(0, re.compile(words_pattern(self.candidates)))
+            self.candidates = []
+        elif self.candidates:
+            self.required.insert(0, re.compile("|".join(map(re.escape, self.candidates))))
+        self._required_ignorecase = [
+            re.compile(pattern.pattern, pattern.flags | re.IGNORECASE) for pattern in self.required
+        ]
+        self.read = 0
+
+    def _haystack(self, text: str):
+        """the text to search and the patterns to search it with"""
+        # lowercasing is much faster than an IGNORECASE search, but only
+        # keeps offsets intact for ASCII, which is what json.dumps writes
+        if text.isascii():
+            return text.lower(), self.required
+        return text, self._required_ignorecase
+
+    def _positions(self, haystack: str, patterns) -> list[int]:
+        """where the first filter matches in a chunk"""
+        if self.candidates and patterns is self.required:
+            positions = []
+            for candidate in self.candidates:
+                pos = haystack.find(candidate)
+                while pos != -1:
+                    positions.append(pos)
+                    pos = haystack.find(candidate, pos + 1)
+            return sorted(positions)
+        return [m.start() for m in patterns[0].finditer(haystack)]
+
+    def __iter__(self) -> Iterator[dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            # a single line export can be the whole file, so don't read past a chunk
+            first = f.readline(CHUNK_SIZE)
+            while first and not first.strip():
+                first = f.readline(CHUNK_SIZE)
+            start = first.lstrip()
+            if start.startswith("{"):
+                try:
+                    data = json.loads(first)
+                except json.JSONDecodeError:
+                    data = None  # a pretty printed or long object, not JSON lines
+                if data is not None and not isinstance(data.get("messages"), list):
+                    yield from self._iter_lines(f, first)
+                    return
+
+            buffer = first
+            while True:
+                if start.startswith("["):
+                    yield from self._iter_array(f, buffer[buffer.index("[") + 1:])
+                    return
+                found = _MESSAGES_KEY.search(buffer)
+                if found:
+                    yield from self._iter_array(f, buffer[found.end():])
+                    return
+                more = f.read(CHUNK_SIZE)
+                if not more:
+                    raise ValueError(f"{self.path} has no messages array")
+                # keep a tail in case the key is split between reads
+                buffer = buffer[-64:] + more
+
+    def _iter_lines(self, f, chunk: str) -> Iterator[dict]:
+        while chunk:
+            # whole lines only, the last one is finished with readline
+            chunk += f.read(CHUNK_SIZE)
+            chunk += f.readline()
+            self.read += chunk.count("\n") + (not chunk.endswith("\n"))
+            if not self.required:
+                for line in chunk.splitlines():
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                haystack, patterns = self._haystack(chunk)
+                line_end = -1
+                for pos in self._positions(haystack, patterns):
+                    if pos < line_end:
+                        continue  # same line as the previous candidate
+                    line_start = chunk.rfind("\n", 0, pos) + 1
+                    line_end = chunk.find("\n", pos)
+                    if line_end == -1:
+                        line_end = len(chunk)
+                    line = haystack[line_start:line_end]
+                    if all(pattern.search(line) for pattern in patterns[1:]):
+                        yield json.loads(chunk[line_start:line_end])
+            chunk = f.readline()
+
+    def _iter_array(self, f, buffer: str) -> Iterator[dict]:
+        """yields the elements of a JSON array, ``buffer`` starts right after its ``[``"""
+        decoder = json.JSONDecoder()
+        pos = 0
+        eof = False
+        while True:
+            pos = _SKIP.match(buffer, pos).end()
+            if pos >= len(buffer):
+                if eof:
+                    return
+                buffer, pos = f.read(CHUNK_SIZE), 0
+                eof = not buffer
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the element runs past the end of the buffer
+                more = f.read(CHUNK_SIZE)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            self.read += 1
+            yield item
+            pos = end
+
+
+def author_id(message: dict) -> Optional[int]:
+    author = message.get("author")
+    if isinstance(author, dict):
+        value = author.get("id")
+    else:
+        value = message.get("author_id", message.get("user_id"))
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def places(message: dict) -> list:
+    """the ``guild_id`` and ``channel_id`` of a message, for exports that have them"""
+    found = []
+    for key in ("guild_id", "channel_id"):
+        try:
+            found.append(int(message[key]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return found
+
+
+def author_name(message: dict) -> Optional[str]:
+    author = message.get("author")
+    if isinstance(author, dict):
+        for key in ("nickname", "global_name", "name", "username"):
+            if author.get(key):
+                return author[key]
+    return None
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+import threading
+
+
+def atomic_write(path: str, text: str) -> None:
+    """writes to a temp file next to ``path`` and swaps it in, so readers never see half a file"""
+    # one temp file per writer, the bot and the GUI both write .env
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class WriteBehind:
+    """Runs ``write`` in the default executor ``delay`` seconds after a change.
+
+    Every change until then is picked up by the same write. ``snapshot`` is
+    called on the loop thread first and its result passed to ``write``, for
+    state that mustn't be read while the loop changes it.
+    """
+
+    def __init__(self, write, delay: float, snapshot=None, what: str = "file"):
+        self.write = write
+        self.delay = delay
+        self.snapshot = snapshot
+        self.what = what
+        self._handle = None
+
+    def schedule(self) -> bool:
+        """returns False outside an event loop, where nothing gets written"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._handle is None:
+            self._handle = loop.call_later(self.delay, self._run, loop)
+        return True
+
+    def _run(self, loop) -> None:
+        self._handle = None
+        args = (self.snapshot(),) if self.snapshot else ()
+        future = loop.run_in_executor(None, self.write, *args)
+        future.add_done_callback(self._log_error)
+
+    def _log_error(self, future) -> None:
+        if future.exception():
+            logging.error(f"Error saving {self.what}: {future.exception()}")
+
+    def cancel(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
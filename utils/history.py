@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from utils.batching import BatchWorker
+
+HISTORY_FILE = "shock_history.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shocks (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    user_id INTEGER,
+    word TEXT,
+    mode TEXT NOT NULL,
+    intensity INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    device TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shocks_ts ON shocks (ts);
+CREATE INDEX IF NOT EXISTS shocks_user_ts ON shocks (user_id, ts);
+CREATE INDEX IF NOT EXISTS shocks_word_ts ON shocks (word, ts);
+"""
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)([smhdw])")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+class ShockEvent(NamedTuple):
+    ts: float
+    user_id: Optional[int]
+    word: Optional[str]  # lowercased
+    mode: str
+    intensity: int
+    duration: int
+    device: str
+    result: str  # "sent", "merged", "dropped" or "error: ..."
+
+
+def parse_age(value: str) -> float:
+    """parses ``90s``, ``15m``, ``2h``, ``3d`` or ``1w`` (or combinations like ``1h30m``) into seconds"""
+    value = value.strip().lower()
+    parts = _DURATION.findall(value)
+    if not parts or "".join(a + u for a, u in parts) != value:
+        raise ValueError(f"Invalid time `{value}`, use e.g. 30m, 2h or 1d.")
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def parse_filters(args) -> dict:
+    """parses ``>history`` arguments: ``user=<id or mention>``, ``word=``, ``since=``, ``until=`` and ``limit=``
+
+    ``since`` and ``until`` are ages, so ``since=2h until=1h`` is the hour before last.
+    """
+    filters = {}
+    now = time.time()
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Invalid filter `{arg}`, use key=value.")
+        key = key.lower()
+        if key == "user":
+            digits = value.strip("<@!>")
+            if not digits.isdigit():
+                raise ValueError(f"Invalid user `{value}`.")
+            filters["user_id"] = int(digits)
+        elif key == "word":
+            filters["word"] = value
+        elif key == "since":
+            filters["since"] = now - parse_age(value)
+        elif key == "until":
+            filters["until"] = now - parse_age(value)
+        elif key == "limit":
+            if not value.isdigit():
+                raise ValueError(f"Invalid limit `{value}`.")
+            filters["limit"] = int(value)
+        else:
+            raise ValueError(f"Unknown filter `{key}`, use user, word, since, until or limit.")
+    return filters
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps the database consistent on a crash, NORMAL only risks the last batch
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ShockHistory:
+    """Append-only record of every dispatched shock, in SQLite.
+
+    ``record`` only queues the event. A ``BatchWorker`` thread inserts
+    whatever has queued up in one transaction, so the event loop never
+    waits on disk. Queries run in a thread too, on their own connection,
+    which WAL lets read while the writer writes.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        conn = connect(path)
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+        self._reader = connect(path)
+        self._read_lock = threading.Lock()
+        # only used from the writer thread
+        self._conn = connect(path)
+        self._writer = BatchWorker("shock-history", self._write, batch_size)
+        self._writer.start()
+
+    def record(self, event: ShockEvent) -> None:
+        self._writer.put(event)
+
+    def _write(self, batch: list[ShockEvent]) -> None:
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO shocks (ts, user_id, word, mode, intensity, duration, device, result)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logging.error(f"Error writing shock history: {e}")
+
+    def _query(self, user_id=None, word=None, since=None, until=None, limit=10) -> list[ShockEvent]:
+        where, params = [], []
+        if user_id is not None:
+            where.append("user_id = ?")
+            params.append(user_id)
+        if word is not None:
+            where.append("word = ?")
+            params.append(word.lower())
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts <= ?")
+            params.append(until)
+        sql = "SELECT ts, user_id, word, mode, intensity, duration, device, result FROM shocks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            return [ShockEvent(*row) for row in self._reader.execute(sql, params)]
+
+    async def query(self, **filters) -> list[ShockEvent]:
+        """newest first, filtered by ``user_id``, ``word``, ``since`` and ``until`` (unix times)"""
+        return await asyncio.to_thread(self._query, **filters)
+
+    def close(self) -> None:
+        """writes what's queued and closes the database"""
+        self._writer.stop()
+        self._conn.close()
+        self._reader.close()
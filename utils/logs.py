@@ -0,0 +1,108 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, RotatingFileHandler, TimedRotatingFileHandler
+
+from utils.batching import BatchWorker
+
+
+class BatchFlushMixin:
+    """Skips the flush after every record, the listener flushes once per batch."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+class BatchRotatingFileHandler(BatchFlushMixin, RotatingFileHandler):
+    pass
+
+
+class BatchTimedRotatingFileHandler(BatchFlushMixin, TimedRotatingFileHandler):
+    pass
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line."""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class LogListener(BatchWorker):
+    """Background thread that drains the log queue and writes in batches."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, handlers: list, batch_size: int = 512):
+        super().__init__("log-listener", self._write, batch_size, log_queue)
+        self.handlers = handlers
+
+    def _write(self, batch):
+        for record in batch:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        for handler in self.handlers:
+            handler.flush_batch()
+
+    def stop(self):
+        """flushes what's queued and stops the thread"""
+        super().stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+def setup_logging(logger: logging.Logger, path: str) -> LogListener:
+    """Routes ``logger`` through a queue to a rotating file written off-thread.
+
+    Settings are read from the environment:
+
+    - ``LOG_FORMAT``: ``text`` (default) or ``json`` for JSON lines
+    - ``LOG_MAX_BYTES``: rotate when the file reaches this size, default 5 MB
+    - ``LOG_ROTATE_WHEN``: rotate on time instead, e.g. ``midnight`` or ``h``
+    - ``LOG_BACKUPS``: how many rotated files to keep, default 3
+    """
+    backups = int(os.getenv("LOG_BACKUPS", 3))
+    when = os.getenv("LOG_ROTATE_WHEN")
+    if when:
+        handler = BatchTimedRotatingFileHandler(
+            path, when=when, backupCount=backups, delay=True
+        )
+    else:
+        handler = BatchRotatingFileHandler(
+            path,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024)),
+            backupCount=backups,
+            delay=True,
+        )
+
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+
+    log_queue = queue.SimpleQueue()
+    listener = LogListener(log_queue, [handler])
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+    return listener
@@ -0,0 +1,76 @@
+import re
+from typing import Iterable, NamedTuple, Optional
+
+
+class TriggerMatch(NamedTuple):
+    word: str
+    offset: int
+    end: int
+
+
+def _trie_pattern(node: dict) -> str:
+    """turns a character trie into a regex that never backtracks across siblings"""
+    end = "" in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not end:
+        return branches[0]
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if end else body
+
+
+def words_pattern(words: Iterable[str]) -> str:
+    """a regex matching any of the words (already lowercased), without word boundaries"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _trie_pattern(trie)
+
+
+class TriggerMatcher:
+    """Finds trigger words in a message in a single pass.
+
+    The wordlist is compiled once into one case-insensitive regex shaped like
+    a trie, so the cost per message depends on the message length rather than
+    on the number of words. Words only match on word boundaries, so "no" does
+    not fire on "know".
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = tuple(words)
+        self._lookup = {}
+        for word in self.words:
+            key = word.lower()
+            if key and key not in self._lookup:
+                self._lookup[key] = word
+
+        self._regex = None
+        if self._lookup:
+            self._regex = re.compile(
+                r"(?<!\w)(" + words_pattern(self._lookup) + r")(?!\w)", re.IGNORECASE
+            )
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def _match(self, m: re.Match) -> TriggerMatch:
+        text = m.group(1)
+        return TriggerMatch(self._lookup.get(text.lower(), text), m.start(1), m.end(1))
+
+    def search(self, text: str) -> Optional[TriggerMatch]:
+        """returns the first trigger in the text, or None"""
+        if self._regex is None:
+            return None
+        m = self._regex.search(text)
+        return self._match(m) if m else None
+
+    def find_all(self, text: str) -> list[TriggerMatch]:
+        """returns every non-overlapping trigger in the text"""
+        if self._regex is None:
+            return []
+        return [self._match(m) for m in self._regex.finditer(text)]
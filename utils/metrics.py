@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from bisect import bisect_left
+
+from utils.files import atomic_write
+
+# upper bounds in seconds, the last bucket catches everything above
+LATENCY_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+    0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def prometheus(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value}",
+        ]
+
+    def summary(self) -> str:
+        return f"{self.name}: {self.value}"
+
+
+class Gauge:
+    """A value read from ``fn`` whenever the metrics are rendered."""
+
+    def __init__(self, name: str, help: str, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    @property
+    def value(self) -> float:
+        try:
+            return float(self.fn())
+        except Exception:
+            return float("nan")
+
+    def prometheus(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.value}",
+        ]
+
+    def summary(self) -> str:
+        if self.name.endswith("_seconds"):
+            return f"{self.name}: {self.value * 1000:.1f}ms"
+        return f"{self.name}: {self.value:g}"
+
+
+class Histogram:
+    """Fixed-bucket histogram, observing a value only bumps preallocated counts."""
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def prometheus(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {seen}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+    def summary(self) -> str:
+        if not self.count:
+            return f"{self.name}: no data"
+        mean = self.sum / self.count * 1000
+        p50 = self.quantile(0.5) * 1000
+        p99 = self.quantile(0.99) * 1000
+        return f"{self.name}: n={self.count} mean={mean:.2f}ms p50<={p50:g}ms p99<={p99:g}ms"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._add(Counter(name, help))
+
+    def histogram(self, name: str, help: str) -> Histogram:
+        return self._add(Histogram(name, help))
+
+    def gauge(self, name: str, help: str, fn) -> Gauge:
+        """registers (or replaces) a gauge, so reloading a cog can rebind it"""
+        self.metrics[name] = Gauge(name, help, fn)
+        return self.metrics[name]
+
+    def render_text(self) -> str:
+        return "\n".join(metric.summary() for metric in self.metrics.values())
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.prometheus())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """writes the prometheus text format, replacing the file atomically"""
+        atomic_write(path, self.render_prometheus())
+
+    async def export(self, path: str, interval: float) -> None:
+        """writes the metrics file every ``interval`` seconds until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.write, path)
+            except OSError as e:
+                logging.error(f"Error writing metrics: {e}")
+
+
+METRICS = Registry()
+
+messages_seen = METRICS.counter("shock_messages_total", "Messages seen by the shock cog.")
+messages_matched = METRICS.counter("shock_messages_matched_total", "Messages that matched a trigger.")
+messages_duplicate = METRICS.counter("shock_messages_duplicate_total", "Replayed messages and no-op edits skipped by the message cache.")
+dispatch_errors = METRICS.counter("shock_dispatch_errors_total", "PiShock calls that failed.")
+on_message_seconds = METRICS.histogram("shock_on_message_seconds", "Time spent filtering a message in Shocker.on_message.")
+match_seconds = METRICS.histogram("shock_match_seconds", "Time spent matching trigger words.")
+parse_seconds = METRICS.histogram("shock_parse_seconds", "Time spent parsing a triggering message.")
+queue_seconds = METRICS.histogram("shock_queue_seconds", "Time from queueing a shock to it being acknowledged.")
+dispatch_seconds = METRICS.histogram("shock_dispatch_seconds", "PiShock API call round-trip.")
+pattern_step_error_seconds = METRICS.histogram("shock_pattern_step_error_seconds", "How late each pattern step was sent, compared to its scheduled time.")
+rest_seconds = METRICS.histogram("discord_rest_seconds", "Discord REST round-trip measured by >ping.")
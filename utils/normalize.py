@@ -0,0 +1,108 @@
+import functools
+import unicodedata
+
+# zero-width, joiners, direction marks, variation selectors and tag characters
+_INVISIBLE = [
+    0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x3164, 0xFEFF, 0xFFA0,
+    *range(0x180B, 0x1810),
+    *range(0x200B, 0x2010),
+    *range(0x202A, 0x202F),
+    *range(0x2060, 0x2070),
+    *range(0xFE00, 0xFE10),
+    *range(0xE0000, 0xE0080),
+    *range(0xE0100, 0xE01F0),
+]
+
+# blocks whose letters have compatibility forms or accents to fold
+_FOLD_RANGES = [
+    (0x00A0, 0x0250),  # Latin-1 and Latin Extended
+    (0x0300, 0x0370),  # combining marks, e.g. s̶h̶o̶c̶k̶
+    (0x0370, 0x0530),  # Greek and Cyrillic
+    (0x1D00, 0x1DC0),  # phonetic extensions
+    (0x1DC0, 0x1E00),  # combining marks supplement
+    (0x1E00, 0x2000),  # Latin Extended Additional, Greek Extended
+    (0x2070, 0x20A0),  # super and subscripts
+    (0x20D0, 0x2100),  # combining marks for symbols
+    (0x2100, 0x2150),  # letterlike symbols
+    (0x2150, 0x2190),  # number forms
+    (0x2460, 0x2500),  # enclosed alphanumerics
+    (0xFB00, 0xFB07),  # ligatures
+    (0xFE20, 0xFE30),  # combining half marks
+    (0xFF00, 0xFFF0),  # full width forms
+    (0x1D400, 0x1D800),  # mathematical alphanumerics
+    (0x1F100, 0x1F1E6),  # enclosed alphanumeric supplement
+]
+
+# Cyrillic and Greek letters that look like Latin ones
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "з": "3", "и": "u", "і": "i", "ї": "i",
+    "ј": "j", "һ": "h", "к": "k", "м": "m", "н": "h", "о": "o", "п": "n", "р": "p", "с": "c",
+    "т": "t", "у": "y", "х": "x", "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w", "ь": "b",
+    "α": "a", "β": "b", "γ": "y", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+}
+
+# applied last, so "ѕһ0ск" and "sh0ck" end up the same
+LEETSPEAK = {
+    "0": "o", "1": "i", "l": "i", "3": "e", "4": "a", "@": "a",
+    "5": "s", "$": "s", "7": "t", "8": "b",
+}
+
+
+def _fold(ch: str) -> str:
+    """compatibility-folds one character and drops its accents"""
+    if unicodedata.combining(ch):
+        return ""
+    decomposed = unicodedata.normalize("NFKD", ch)
+    return unicodedata.normalize(
+        "NFC", "".join(c for c in decomposed if not unicodedata.combining(c))
+    )
+
+
+@functools.cache
+def table() -> dict[int, str]:
+    """the ``str.translate`` table, built on first use
+
+    Each character maps straight to its final form (fold, then lowercase,
+    then confusables, then leetspeak), so normalizing is a single pass.
+    """
+
+    def final(text: str) -> str:
+        text = text.lower()
+        text = "".join(CONFUSABLES.get(c, c) for c in text)
+        return "".join(LEETSPEAK.get(c, c) for c in text)
+
+    mapping = {}
+    for low, high in _FOLD_RANGES:
+        for code in range(low, high):
+            ch = chr(code)
+            if unicodedata.category(ch) == "Cn":
+                continue
+            mapped = final(_fold(ch))
+            if mapped != ch:
+                mapping[code] = mapped
+    for ch in list(CONFUSABLES) + [c.upper() for c in CONFUSABLES] + list(LEETSPEAK):
+        mapped = final(_fold(ch))
+        if mapped != ch:
+            mapping[ord(ch)] = mapped
+    mapping[ord("L")] = "i"
+    for code in _INVISIBLE:
+        mapping[code] = ""
+    return mapping
+
+
+def normalize(text: str) -> str:
+    """folds obfuscated text (full width, accents, look-alikes, leetspeak, hidden characters) to plain letters for matching"""
+    return text.translate(table())
+
+
+def source_offset(text: str, offset: int) -> int:
+    """maps an offset in ``normalize(text)`` back to ``text``, past any characters that were removed"""
+    mapping = table()
+    position = 0
+    for index, ch in enumerate(text):
+        length = len(mapping.get(ord(ch), ch))
+        if position >= offset and length:
+            return index
+        position += length
+    return len(text)
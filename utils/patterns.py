@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple
+
+from utils import metrics
+from utils.rules import MAX_DURATION, MAX_INTENSITY, MIN_DURATION, MIN_INTENSITY, MODES, _clamp
+
+MAX_STEPS = 20
+MAX_GAP = 10.0
+MAX_PATTERN_SECONDS = 60.0
+
+
+class Step(NamedTuple):
+    mode: str
+    intensity: int
+    duration: int
+    gap: float = 0.0  # seconds to wait after the step finishes
+
+
+def parse_patterns(data) -> dict[str, tuple[Step, ...]]:
+    """parses the ``patterns`` in ``wordlist.json``, clamping every step to the usual limits::
+
+        {"patterns": {"ramp": [{"mode": "vibrate", "intensity": 20, "duration": 1, "gap": 0.5},
+                               {"intensity": 40, "duration": 1}]}}
+
+    Steps past ``MAX_STEPS`` or past ``MAX_PATTERN_SECONDS`` in total are dropped.
+    """
+    patterns = {}
+    if not isinstance(data, dict):
+        return patterns
+    for name, raw_steps in data.items():
+        if not isinstance(raw_steps, list):
+            continue
+        steps, total = [], 0.0
+        for raw in raw_steps[:MAX_STEPS]:
+            if not isinstance(raw, dict):
+                continue
+            mode = raw.get("mode", "shock")
+            step = Step(
+                mode if mode in MODES else "shock",
+                _clamp(raw.get("intensity"), MIN_INTENSITY, MAX_INTENSITY, 10),
+                _clamp(raw.get("duration"), MIN_DURATION, MAX_DURATION, 1),
+                _clamp(raw.get("gap"), 0.0, MAX_GAP, 0.0, float),
+            )
+            total += step.duration + step.gap
+            if total > MAX_PATTERN_SECONDS:
+                break
+            steps.append(step)
+        if steps:
+            patterns[name.lower()] = tuple(steps)
+    return patterns
+
+
+class PatternScheduler:
+    """Plays named step sequences from one scheduler task.
+
+    Every step is due at a fixed offset from when the pattern started, on the
+    monotonic clock, so a late wake-up or a slow API call never pushes the
+    later steps back. Steps are sent without waiting for the API to answer,
+    and how late each send started is recorded in
+    ``shock_pattern_step_error_seconds``.
+
+    Patterns play one after another, ``stop`` cancels the current one and
+    everything queued.
+    """
+
+    def __init__(self, send, max_queued: int = 4, clock=time.monotonic):
+        self.send = send
+        self.max_queued = max_queued
+        self.clock = clock
+        self.current = None
+        self.last_errors: list[float] = []
+        self._queue: list[tuple[str, tuple[Step, ...], tuple]] = []
+        self._task = None
+        self._sends: set[asyncio.Task] = set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def start(self, name: str, steps: tuple[Step, ...], *context) -> bool:
+        """queues a pattern, ``context`` is passed on to ``send`` with each step"""
+        if len(self._queue) >= self.max_queued:
+            return False
+        self._queue.append((name, steps, context))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    def stop(self) -> int:
+        """cancels the running and queued patterns, returns how many there were"""
+        stopped = len(self._queue) + (self.current is not None)
+        self._queue.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in self._sends:
+            task.cancel()
+        self.current = None
+        return stopped
+
+    async def _run(self) -> None:
+        while self._queue:
+            name, steps, context = self._queue.pop(0)
+            self.current = name
+            try:
+                await self._play(steps, context)
+            finally:
+                self.current = None
+
+    async def _play(self, steps: tuple[Step, ...], context: tuple) -> None:
+        start = self.clock()
+        due = 0.0
+        self.last_errors = errors = []
+        for step in steps:
+            delay = start + due - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            task = asyncio.create_task(self._send(step, context, start + due, errors))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+            # the next step is due relative to the start, not to now
+            due += step.duration + step.gap
+        # wait out the last step, so a queued pattern doesn't cut it short
+        delay = start + due - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _send(self, step: Step, context: tuple, due: float, errors: list[float]) -> None:
+        # measured here rather than on waking up, so waiting for the task to start counts too
+        error = self.clock() - due
+        errors.append(error)
+        metrics.pattern_step_error_seconds.observe(max(0.0, error))
+        try:
+            await self.send(step, *context)
+        except Exception as e:
+            logging.error(f"Error sending pattern step: {e}")
+
+    def close(self) -> None:
+        self.stop()
@@ -0,0 +1,76 @@
+import builtins
+import contextlib
+import sys
+import time
+
+import psutil
+
+
+class StartupProfile:
+    """Collects timings for the startup profile mode (``STARTUP_PROFILE=1``).
+
+    When disabled every method is a no-op, so it can stay in the startup path.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.timings: list[tuple[str, float]] = []
+        self.imports: dict[str, list[tuple[str, float]]] = {}
+        self._reported = False
+
+    def mark(self, label: str, seconds: float) -> None:
+        if self.enabled:
+            self.timings.append((label, seconds))
+
+    def since_process_start(self, label: str) -> None:
+        """records how long the process has been alive, i.e. interpreter and import time"""
+        if self.enabled:
+            started = psutil.Process().create_time()
+            self.mark(label, time.time() - started)
+
+    @contextlib.contextmanager
+    def timer(self, label: str, track_imports: bool = False):
+        """times the block, optionally recording each module it imports for the first time"""
+        if not self.enabled:
+            yield
+            return
+
+        imports = []
+        original = builtins.__import__
+
+        def timed_import(name, *args, **kwargs):
+            if name in sys.modules:
+                return original(name, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(name, *args, **kwargs)
+            finally:
+                imports.append((name, time.perf_counter() - start))
+
+        if track_imports:
+            builtins.__import__ = timed_import
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(label, time.perf_counter() - start)
+            if track_imports:
+                builtins.__import__ = original
+                self.imports[label] = imports
+
+    def report(self) -> list[str]:
+        """returns the report once, later calls (e.g. on reconnect) return nothing"""
+        if not self.enabled or self._reported:
+            return []
+        self._reported = True
+
+        lines = ["Startup profile:"]
+        for label, seconds in self.timings:
+            lines.append(f"  {label}: {seconds * 1000:.1f} ms")
+            # nested imports are inclusive, so only list the slowest ones
+            slowest = sorted(self.imports.get(label, []), key=lambda i: -i[1])[:5]
+            for name, import_seconds in slowest:
+                lines.append(f"    import {name}: {import_seconds * 1000:.1f} ms")
+        rss = psutil.Process().memory_info().rss
+        lines.append(f"  resident memory: {rss / 2**20:.1f} MiB")
+        return lines
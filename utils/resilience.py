@@ -0,0 +1,174 @@
+import asyncio
+import http
+import logging
+import random
+import time
+
+import requests
+from pishock.zap.httpapi import DeviceInUseError, HTTPError
+from urllib3.exceptions import NewConnectionError
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the breaker is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """True only for failures where the command can't have reached the device.
+
+    A shock isn't idempotent, so anything that might have been delivered
+    (read timeouts, dropped responses) is never retried.
+    """
+    if isinstance(error, (requests.ConnectTimeout, DeviceInUseError)):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        # refused or unresolvable, nothing was sent
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    if isinstance(error, HTTPError):
+        return error.status_code == http.HTTPStatus.SERVICE_UNAVAILABLE
+    return False
+
+
+def is_unhealthy(error: Exception) -> bool:
+    """True for failures that say the API itself is down, as opposed to e.g. a paused shocker."""
+    if isinstance(error, (asyncio.TimeoutError, requests.RequestException)):
+        return True
+    return isinstance(error, HTTPError) and error.status_code >= 500
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` unhealthy calls in a row.
+
+    After ``reset_timeout`` seconds one trial call is let through, closing the
+    breaker on success or opening it again on failure.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, on_change=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_running = False
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        logging.info(f"PiShock circuit breaker is now {state}.")
+        if self.on_change:
+            self.on_change(state)
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError("PiShock API is unavailable, try again later.")
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_running:
+                self.rejected += 1
+                raise CircuitOpenError("PiShock API is unavailable, try again later.")
+            self._trial_running = True
+
+    def release_trial(self) -> None:
+        """lets the next call be the trial when this one ended without an answer, e.g. cancelled"""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self._trial_running = False
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self, error: Exception) -> None:
+        self._trial_running = False
+        if not is_unhealthy(error):
+            # the API answered, so it's healthy even if the command failed
+            self.failures = 0
+            self._set_state(self.CLOSED)
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+class ResiliencePolicy:
+    """Deadline, in-flight cap, retries and circuit breaker around an API call."""
+
+    def __init__(
+        self,
+        timeout: float = 10,
+        max_in_flight: int = 4,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 4,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.timeouts = 0
+        self.retried = 0
+
+    async def _attempt(self, send, args):
+        self.breaker.before_call()
+        try:
+            async with self._in_flight:
+                self.in_flight += 1
+                try:
+                    result = await asyncio.wait_for(send(*args), self.timeout)
+                finally:
+                    self.in_flight -= 1
+        except asyncio.TimeoutError as e:
+            self.timeouts += 1
+            self.breaker.record_failure(e)
+            raise asyncio.TimeoutError(f"PiShock API did not answer within {self.timeout:g}s.")
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # cancelled by >stop or a closing queue, the API's health is still unknown
+            self.breaker.release_trial()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def call(self, send, *args):
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(send, args)
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    raise
+            attempt += 1
+            self.retried += 1
+            # full jitter, so devices that failed together don't retry together
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            await asyncio.sleep(delay)
+
+    def wrap(self, send):
+        """returns ``send`` with this policy applied"""
+
+        async def resilient_send(*args):
+            return await self.call(send, *args)
+
+        return resilient_send
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.state,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "retried": self.retried,
+            "rejected": self.breaker.rejected,
+        }
@@ -0,0 +1,155 @@
+import re
+from typing import NamedTuple, Optional
+
+from utils.access import to_id
+from utils.matcher import TriggerMatch, TriggerMatcher
+from utils.normalize import normalize, source_offset
+
+MODES = ("shock", "vibrate", "beep")
+MIN_INTENSITY, MAX_INTENSITY = 1, 100
+MIN_DURATION, MAX_DURATION = 1, 15
+
+# "(word) (shock value) (duration)", matched right after the trigger word
+_ARGS = re.compile(r"\s+(\d+)(?:\s+(\d+))?(?!\S)")
+
+
+class TriggerAction(NamedTuple):
+    word: str
+    mode: str
+    intensity: int
+    duration: int
+    pattern: Optional[str] = None
+
+
+class Rule(NamedTuple):
+    mode: str
+    intensity: int
+    duration: int
+    normalize: bool = False  # also match obfuscated spellings
+    pattern: Optional[str] = None  # plays this pattern instead of one shock
+
+
+def _clamp(value, low, high, fallback, cast=int):
+    try:
+        return max(low, min(high, cast(value)))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _rule(data, fallback: Rule) -> Rule:
+    if not isinstance(data, dict):
+        return fallback
+    mode = data.get("mode", fallback.mode)
+    return Rule(
+        mode if mode in MODES else fallback.mode,
+        _clamp(data.get("intensity"), MIN_INTENSITY, MAX_INTENSITY, fallback.intensity),
+        _clamp(data.get("duration"), MIN_DURATION, MAX_DURATION, fallback.duration),
+        bool(data.get("normalize", fallback.normalize)),
+        str(data["pattern"]).lower() if data.get("pattern") else fallback.pattern,
+    )
+
+
+class TriggerRules:
+    """The wordlist compiled into a matcher plus a per-word rule lookup.
+
+    ``wordlist.json`` can hold a ``default`` rule and per-word ``rules``, and
+    ``whitelist.json`` can hold per-user ``caps``::
+
+        {"words": ["shock"], "default": {"intensity": 10, "duration": 1},
+         "rules": {"shock": {"mode": "shock", "intensity": 25, "duration": 2}}}
+
+        {"whitelist": [123], "caps": {"123": {"intensity": 50, "duration": 5}}}
+
+    Values written after the trigger (``shock 40 3``) override the rule, but
+    must stay within 1-100 intensity and 1-15 seconds.
+
+    A rule with ``"normalize": true`` also matches obfuscated spellings of its
+    word ("SH0CK", "ｓｈｏｃｋ", hidden characters), see ``utils.normalize``.
+    That only costs extra on messages without a plain match, and only when
+    some word opts in.
+    """
+
+    DEFAULT = Rule("shock", 10, 1)
+
+    def __init__(self, wordlist: Optional[dict] = None, whitelist: Optional[dict] = None):
+        wordlist = wordlist if isinstance(wordlist, dict) else {}
+        whitelist = whitelist if isinstance(whitelist, dict) else {}
+
+        self.matcher = TriggerMatcher(w for w in wordlist.get("words", []) if w)
+        self.default = _rule(wordlist.get("default"), self.DEFAULT)
+
+        rules = wordlist.get("rules") or {}
+        self.rules = {
+            word.lower(): _rule(rules.get(word), self.default)
+            for word in self.matcher.words
+        }
+
+        # normalized spelling -> word, for the words that opted in
+        self._normalized = {}
+        for word in self.matcher.words:
+            if self.rules[word.lower()].normalize:
+                self._normalized.setdefault(normalize(word).lower(), word)
+        self.normalized_matcher = TriggerMatcher(self._normalized)
+
+        self.caps = {}
+        for user_id, cap in (whitelist.get("caps") or {}).items():
+            user_id = to_id(user_id, "caps")
+            if user_id is not None and isinstance(cap, dict):
+                self.caps[user_id] = (
+                    _clamp(cap.get("intensity"), MIN_INTENSITY, MAX_INTENSITY, MAX_INTENSITY),
+                    _clamp(cap.get("duration"), MIN_DURATION, MAX_DURATION, MAX_DURATION),
+                )
+
+    def __bool__(self) -> bool:
+        return bool(self.matcher)
+
+    def _from_normalized(self, content: str, match: TriggerMatch) -> TriggerMatch:
+        return TriggerMatch(
+            self._normalized[match.word],
+            source_offset(content, match.offset),
+            source_offset(content, match.end),
+        )
+
+    def match(self, content: str) -> Optional[TriggerMatch]:
+        found = self.matcher.search(content)
+        if found or not self.normalized_matcher:
+            return found
+        found = self.normalized_matcher.search(normalize(content))
+        return self._from_normalized(content, found) if found else None
+
+    def find_all(self, content: str) -> list[TriggerMatch]:
+        """every trigger in the content, plain matches first"""
+        found = self.matcher.find_all(content)
+        if self.normalized_matcher:
+            seen = {m.offset for m in found}
+            for m in self.normalized_matcher.find_all(normalize(content)):
+                m = self._from_normalized(content, m)
+                if m.offset not in seen:
+                    found.append(m)
+        return found
+
+    def action(self, match: TriggerMatch, content: str, user_id: int) -> TriggerAction:
+        """resolves what a match should do
+
+        Raises:
+            ValueError: values given after the trigger are out of range.
+        """
+        rule = self.rules.get(match.word.lower(), self.default)
+        intensity, duration = rule.intensity, rule.duration
+
+        args = _ARGS.match(content, match.end)
+        if args:
+            intensity = int(args.group(1))
+            if args.group(2):
+                duration = int(args.group(2))
+            if not (MIN_INTENSITY <= intensity <= MAX_INTENSITY) or not (
+                MIN_DURATION <= duration <= MAX_DURATION
+            ):
+                raise ValueError
+
+        cap = self.caps.get(user_id)
+        if cap:
+            intensity = min(intensity, cap[0])
+            duration = min(duration, cap[1])
+
+        return TriggerAction(match.word, rule.mode, intensity, duration, rule.pattern)
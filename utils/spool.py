@@ -0,0 +1,96 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+SPOOL_FILE = "dispatch_spool.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    op TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    intensity INTEGER NOT NULL,
+    claimed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SpooledCommand(NamedTuple):
+    id: int
+    ts: float
+    op: str  # "send" (through the queues) or "direct" (pattern steps)
+    mode: str
+    duration: int
+    intensity: int
+
+
+class CommandSpool:
+    """The dispatch daemon's on-disk queue, so a crash doesn't lose commands.
+
+    A command is written before it's acknowledged, claimed right before the
+    API call that carries it (after any wait in the merging queue and rate
+    limit) and deleted once that's done, so the table only ever holds
+    what's in flight. Every change is synced to disk before returning.
+
+    After a crash, ``recover`` replays unclaimed commands younger than
+    ``freshness`` seconds. Claimed ones may already have been sent, and a
+    shock isn't safe to repeat, so they're dropped: at most once.
+    """
+
+    def __init__(self, path: str = SPOOL_FILE, freshness: float = 30):
+        self.path = path
+        self.freshness = freshness
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FULL syncs every commit, so an acknowledged command survives power loss too
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, op: str, mode: str, duration: int, intensity: int) -> SpooledCommand:
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO spool (ts, op, mode, duration, intensity) VALUES (?, ?, ?, ?, ?)",
+                (now, op, mode, duration, intensity),
+            )
+        return SpooledCommand(cursor.lastrowid, now, op, mode, duration, intensity)
+
+    def claim(self, command_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE spool SET claimed = 1 WHERE id = ?", (command_id,))
+
+    def done(self, command_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM spool WHERE id = ?", (command_id,))
+
+    def recover(self) -> list[SpooledCommand]:
+        """returns the commands to replay after a restart, dropping the rest"""
+        cutoff = time.time() - self.freshness
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, ts, op, mode, duration, intensity, claimed FROM spool ORDER BY id"
+            ).fetchall()
+            self._conn.execute("DELETE FROM spool WHERE claimed = 1 OR ts < ?", (cutoff,))
+        replay = []
+        for *fields, claimed in rows:
+            command = SpooledCommand(*fields)
+            if claimed:
+                logging.warning(f"Not replaying {command}, it may have been sent before the restart.")
+            elif command.ts < cutoff:
+                logging.warning(f"Not replaying {command}, it is older than {self.freshness:g}s.")
+            else:
+                replay.append(command)
+        return replay
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
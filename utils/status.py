@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+
+from utils.files import WriteBehind, atomic_write
+
+STATUS_FILE = "bot_status.json"
+
+
+class StatusWriter:
+    """Publishes the bot's state to a small JSON file for the GUI.
+
+    Updates are coalesced and written at most every ``interval`` seconds,
+    replacing the file atomically so readers never see a partial write.
+    """
+
+    def __init__(self, path: str = STATUS_FILE, interval: float = 0.5, max_events: int = 20):
+        self.path = path
+        self.interval = interval
+        self.state = {
+            "pid": os.getpid(),
+            "started_at": time.time(),
+            "state": "starting",
+            "user": None,
+            "connected": False,
+        }
+        self.events = deque(maxlen=max_events)
+        # snapshot on the loop thread so the events deque isn't read while it changes
+        self._write_behind = WriteBehind(self._write, interval, self.snapshot, "status")
+
+    def publish(self, **fields) -> None:
+        self.state.update(fields)
+        self._schedule()
+
+    def event(self, text: str) -> None:
+        """records a recent dispatch or connection event"""
+        self.events.append({"ts": time.time(), "text": text})
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not self._write_behind.schedule():
+            self.flush()
+
+    def snapshot(self) -> dict:
+        return {**self.state, "updated_at": time.time(), "events": list(self.events)}
+
+    def flush(self) -> None:
+        self._write(self.snapshot())
+
+    def _write(self, data: dict) -> None:
+        try:
+            atomic_write(self.path, json.dumps(data))
+        except OSError as e:
+            logging.error(f"Error writing status: {e}")
+
+
+class StatusReader:
+    """Reads the status file only when it has changed since the last read."""
+
+    def __init__(self, path: str = STATUS_FILE):
+        self.path = path
+        self.status = {}
+        self._signature = None
+
+    def read(self) -> dict:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.status = {}
+            self._signature = None
+            return self.status
+
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature != self._signature:
+            try:
+                with open(self.path, "r") as f:
+                    self.status = json.load(f)
+                self._signature = signature
+            except (OSError, json.JSONDecodeError):
+                pass
+        return self.status
@@ -0,0 +1,145 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+PID_FILE = "bot.pid"
+
+
+class BotSupervisor:
+    """Owns the bot process so the GUI never has to scan the process table.
+
+    Nothing here blocks: ``start`` and ``stop`` return immediately and
+    ``poll`` is meant to be called from a timer (Tk ``after``) to notice
+    exits, finish stops and restart a crashed bot with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        script: str = "main.py",
+        pid_file: str = PID_FILE,
+        output_file: str = "bot_output.log",
+        stop_timeout: float = 5.0,
+        max_backoff: float = 60.0,
+    ):
+        self.command = [sys.executable, script]
+        self.script = script
+        self.pid_file = pid_file
+        self.output_file = output_file
+        self.stop_timeout = stop_timeout
+        self.max_backoff = max_backoff
+        self.auto_restart = True
+        self.process = None
+        self.last_exit_code = None
+        self.restarts = 0
+        self._backoff = 1.0
+        self._started_at = 0.0
+        self._stop_deadline = None
+        self._restart_at = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def state(self) -> str:
+        if self._stop_deadline is not None:
+            return "stopping"
+        if self.running:
+            return "running"
+        if self._restart_at is not None:
+            return f"restarting in {max(0, self._restart_at - time.monotonic()):.0f}s"
+        return "stopped"
+
+    def _read_pid_file(self):
+        try:
+            with open(self.pid_file, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def stop_orphan(self) -> None:
+        """stops a bot left running by a previous GUI, found through the pid file"""
+        pid = self._read_pid_file()
+        if not pid or pid == self.pid:
+            return
+        try:
+            proc = psutil.Process(pid)
+            if any(arg.endswith(self.script) for arg in proc.cmdline()):
+                logging.info(f"Terminating process: {pid}")
+                proc.terminate()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+        self._remove_pid_file()
+
+    def _remove_pid_file(self) -> None:
+        try:
+            os.remove(self.pid_file)
+        except FileNotFoundError:
+            pass
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.stop_orphan()
+        self._restart_at = None
+        self._stop_deadline = None
+        with open(self.output_file, "a") as output:
+            self.process = subprocess.Popen(
+                self.command,
+                cwd=os.getcwd(),
+                env=os.environ.copy(),
+                stdout=output,
+                stderr=output,
+            )
+        self._started_at = time.monotonic()
+        with open(self.pid_file, "w") as f:
+            f.write(str(self.process.pid))
+
+    def stop(self) -> None:
+        """asks the bot to exit, ``poll`` kills it if it takes too long"""
+        self._restart_at = None
+        if not self.running:
+            return
+        self.process.terminate()
+        self._stop_deadline = time.monotonic() + self.stop_timeout
+
+    def restart(self) -> None:
+        self.stop()
+        self._restart_at = time.monotonic()
+
+    def poll(self):
+        """checks on the process, returns its exit code the first time it's seen exiting"""
+        now = time.monotonic()
+
+        if self.process is not None:
+            code = self.process.poll()
+            if code is None:
+                if self._stop_deadline is not None and now >= self._stop_deadline:
+                    self.process.kill()
+                return None
+
+            stopping = self._stop_deadline is not None
+            self.process = None
+            self._stop_deadline = None
+            self.last_exit_code = code
+            self._remove_pid_file()
+
+            if now - self._started_at > self.max_backoff:
+                self._backoff = 1.0
+            if not stopping and code != 0 and self.auto_restart:
+                self._restart_at = now + self._backoff
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+            return code
+
+        if self._restart_at is not None and now >= self._restart_at:
+            self.restarts += 1
+            self.start()
+        return None
@@ -0,0 +1,95 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+import serial
+from pishock import SerialAPI
+from pishock.zap.serialapi import SerialOperation, ShockerNotFoundError
+
+_STOP = object()
+
+
+class SerialShocker:
+    """One shocker on the hub, with the same calls as the HTTP shocker."""
+
+    def __init__(self, transport: "SerialTransport", shocker_id: int):
+        self.transport = transport
+        self.shocker_id = shocker_id
+
+    def shock(self, *, duration, intensity) -> None:
+        self.transport.operate(self.shocker_id, SerialOperation.SHOCK, duration, intensity)
+
+    def vibrate(self, *, duration, intensity) -> None:
+        self.transport.operate(self.shocker_id, SerialOperation.VIBRATE, duration, intensity)
+
+    def beep(self, duration) -> None:
+        self.transport.operate(self.shocker_id, SerialOperation.BEEP, duration)
+
+
+class SerialTransport:
+    """Talks to a USB-attached PiShock hub instead of the cloud API.
+
+    Stands in for ``PiShockAPI`` in a ``ShockerPool``: ``shocker(code)`` takes
+    the shocker id shown on the PiShock website. The port is opened once and
+    kept open, and every write goes through one writer thread so commands for
+    different shockers never interleave on the port.
+
+    Opening the port asks the hub for its info, which blocks, so create it in
+    a thread.
+    """
+
+    def __init__(self, port: str | None = None):
+        self.api = SerialAPI(port)
+        self.port = self.api.dev.port
+        self.info = self.api.info()
+        self.shocker_ids = {s["id"] for s in self.info.get("shockers", [])}
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._run, name="pishock-serial", daemon=True
+        )
+        self._writer.start()
+
+    def shocker(self, code) -> SerialShocker:
+        shocker_id = int(code)
+        if shocker_id not in self.shocker_ids:
+            available = ", ".join(str(i) for i in sorted(self.shocker_ids))
+            raise ShockerNotFoundError(
+                f"Shocker {shocker_id} not found on {self.port}, available: {available}"
+            )
+        return SerialShocker(self, shocker_id)
+
+    def operate(self, shocker_id: int, operation, duration, intensity=None) -> None:
+        """queues a command and blocks until it has been written to the port"""
+        future = Future()
+        self._queue.put((future, shocker_id, operation, duration, intensity))
+        future.result()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            future, *args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if not self.api.dev.is_open:
+                    # the hub was unplugged or reset, try the same port again
+                    logging.info(f"Reopening serial port {self.port}.")
+                    self.api.dev.open()
+                self.api.operate(*args)
+                self.api.dev.flush()
+            except Exception as e:
+                if isinstance(e, serial.SerialException):
+                    self.api.dev.close()
+                future.set_exception(e)
+            else:
+                self.written += 1
+                future.set_result(None)
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join(timeout=1)
+        self.api.dev.close()